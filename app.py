@@ -1,154 +1,355 @@
 from typing import Optional
 import logging
 import os
+import time
 
-from flask import Flask, jsonify, make_response, request
-from flask_inputs import Inputs # type: ignore
-from flask_inputs.validators import JsonSchema # type: ignore
+from flask import Flask, Response, jsonify, make_response, request
 from flask_cors import CORS # type: ignore
 
+from config import database_url
 from models import db
 import models
-from logic import play_turn, Move, TurnResult
+from game.rules import Move, TurnResult, MAX_PLAYERS
+from validation import validate_create_game, validate_create_games, validate_join_game, validate_play_turn, validate_rematch, validate_set_autoplay
+from notifier import build_notifier
+from serialize import dumps
+from storage import GameStorage, SQLAlchemyStorage, Conflict
+from cache import GameCache, CachedStorage
+from autoplay import Autoplayer
+from timeouts import TurnTimer
+import lobby
+from game.search import choose_move
+from metrics import TimedQueuePool, metrics
+import metrics as Metrics
+from profiling import span, spans
+import profiling
+import hand as Hand
 
-logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
-if DATABASE_URL:
-    app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
-else:
-    app.config["SQLALCHEMY_DATABASE_URI"] = (
-        "postgresql://" +
-        os.environ["PGUSER"] + ":" +
-        os.environ.get("PGPASSWORD", "") + "@" +
-        os.environ.get("PGHOST", "localhost") + "/" +
-        os.environ["PGDATABASE"]
-    )
-
-db.init_app(app)
+app.config["SQLALCHEMY_DATABASE_URI"] = database_url()
 
-CORS(app, resources={r"/api/*": {"origins": "*"}})
-
-PLAY_TURN_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "player_id": {
-            "type": "string",
-        },
-        "move": {
-            "type": "string",
-            "enum": list(m.name for m in Move),
-        },
-        "card_value": {
-            "type": "integer",
-            "minimum": 0,
-            "exclusiveMaximum": 52,
-        },
-    },
-    "required": ["player_id", "card_value", "move"]
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "poolclass": TimedQueuePool,
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+    # Seconds to wait for a connection before failing the request
+    "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") == "1",
 }
+STATEMENT_TIMEOUT_MS = os.environ.get("DB_STATEMENT_TIMEOUT_MS")
+if STATEMENT_TIMEOUT_MS and app.config["SQLALCHEMY_DATABASE_URI"].startswith("postgres"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {
+        "options": f"-c statement_timeout={int(STATEMENT_TIMEOUT_MS)}",
+    }
 
-CREATE_GAME_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "player_id": {
-            "type": "string",
-            "minLength": 1,
-        },
-    },
-    "required": ["player_id"]
-}
+db.init_app(app)
+with app.app_context():
+    Metrics.install(app, db.engine)
+profiling.install(app)
+
+# Set GAME_NOTIFIER=postgres when running more than one worker
+notifier = build_notifier(os.environ.get("GAME_NOTIFIER"), app.config["SQLALCHEMY_DATABASE_URI"])
+UPDATES_TIMEOUT_SECONDS = 25
+
+# Set GAME_ENGINE=memory to play turns against in-memory games, which are written
+# to the database in the background. Only safe with a single worker.
+game_storage: GameStorage
+if os.environ.get("GAME_ENGINE") == "memory":
+    game_storage = CachedStorage(GameCache(
+        app,
+        flush_interval=float(os.environ.get("GAME_CACHE_FLUSH_INTERVAL", "0.05")),
+        on_persisted=notifier.notify,
+    ))
+else:
+    game_storage = SQLAlchemyStorage(on_saved=notifier.notify)
 
-JOIN_GAME_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "player_id": {
-            "type": "string",
-            "minLength": 1,
-        },
-    },
-    "required": ["player_id"]
-}
+autoplayer = Autoplayer(app, game_storage)
 
-class PlayTurnInputs(Inputs):
-    json = [JsonSchema(schema=PLAY_TURN_SCHEMA)]
+# Runs in the `clock` process, see `timeouts.py`, or here with TURN_TIMER=thread.
+# That process also picks up the autoplay turns left by processes that stopped.
+turn_timer = TurnTimer(app, game_storage, notifier, on_played=autoplayer.after_turn)
+if os.environ.get("TURN_TIMER") == "thread":
+    turn_timer.start()
+    autoplayer.recover()
 
-class JoinGameInputs(Inputs):
-    json = [JsonSchema(schema=JOIN_GAME_SCHEMA)]
+CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-class CreateGameInputs(Inputs):
-    json = [JsonSchema(schema=CREATE_GAME_SCHEMA)]
+def json_response(payload, status: int = 200) -> Response:
+    """
+    Like `jsonify`, but encodes with `serialize.dumps`, which is faster.
+    """
+    with span("serialization"):
+        body = dumps(payload)
+    return Response(body, status=status, mimetype="application/json")
 
 def resource_not_found(resource, resource_id):
     response = {
         "error": f"No {resource} found with id: {resource_id}",
     }
-    return make_response(jsonify(response), 404)
+    return json_response(response, 404)
+
+def turn_conflict():
+    return { "error": "turn_conflict" }, 409
+
+def game_etag(game: models.Game) -> str:
+    return f"{game.id}-{game.state_key()}"
+
+def conditional_response(etag: str, build_body):
+    """
+    Responds with 304 if the client already has `etag`, without calling `build_body`.
+    """
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(build_body())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 @app.route('/')
 def index():
     return jsonify({ "status": "healthy" })
 
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    with app.app_context():
+        return json_response(metrics.summary(db.engine.pool))
+
+@app.route("/metrics/prometheus", methods=["GET"])
+def get_prometheus_metrics():
+    """
+    Route spans are only recorded when PROFILE_SPANS=1, see `profiling.py`.
+    """
+    with app.app_context():
+        text = metrics.prometheus(db.engine.pool) + spans.prometheus()
+    return Response(text, mimetype="text/plain; version=0.0.4")
+
 @app.route("/api/games/<game_id>", methods=["GET"])
 def get_game(game_id: str):
     with app.app_context():
-        game = models.Game.query.get(game_id)
+        with span("db"):
+            game = models.Game.query.get(game_id)
+        if not game:
+            return get_archived_game(game_id)
+
+        def build_body():
+            with span("db"):
+                # Loaded here rather than by `serialize`, and not at all for a 304
+                game.players
+            return json_response(game.serialize())
+        return conditional_response(game_etag(game), build_body)
+
+def get_archived_game(game_id: str):
+    """
+    Finished and abandoned games are moved to the archive by `archive.py`.
+    """
+    with span("db"):
+        archived = models.ArchivedGame.query.get(game_id)
+    if not archived:
+        return resource_not_found(resource="game", resource_id=game_id)
+    # Archived games never change
+    etag = f"{archived.id}-archived"
+    return conditional_response(etag, lambda: json_response(archived.serialize()))
+
+@app.route("/api/games/<int:game_id>/snapshot", methods=["GET"])
+def get_game_snapshot(game_id: int):
+    """
+    The game, every player's public view and, if `player_id` is given, that
+    player's own hand. Loads the game and its players in a single query.
+    """
+    player_id = request.args.get("player_id")
+    with app.app_context():
+        with span("db"):
+            game = models.Game.load_with_players(game_id)
         if not game:
             return resource_not_found(resource="game", resource_id=game_id)
-        return jsonify(game.serialize())
+
+        you = game.find_player(player_id) if player_id is not None else None
+        if player_id is not None and not you:
+            return resource_not_found(resource="player", resource_id=player_id)
+
+        return conditional_response(game_etag(game), lambda: json_response({
+            "game": game.serialize(),
+            "players": list(p.serialize_public() for p in game.players),
+            "you": you.serialize_with_playable_cards(game.last_card, game.last_card_count) if you else None,
+        }))
+
+@app.route("/api/games/<int:game_id>/updates", methods=["GET"])
+def watch_game(game_id: int):
+    """
+    Long-poll for changes to a game. Responds as soon as the game's state differs
+    from the `version` the client last saw, or with 204 once the timeout expires.
+    Served by `asgi.py` in production, since this holds a sync worker for as long
+    as it waits.
+    """
+    since = request.args.get("version", "")
+    deadline = time.monotonic() + UPDATES_TIMEOUT_SECONDS
+    with app.app_context():
+        while True:
+            # Read the notifier version before the game, so that a change committed
+            # in between is not missed
+            notified_version = notifier.version(game_id)
+            with span("db"):
+                game = models.Game.query.get(game_id)
+            if not game:
+                return resource_not_found(resource="game", resource_id=game_id)
+            version = game.state_key()
+            if version != since:
+                with span("db"):
+                    game.players
+                return json_response({ "version": version, "game": game.serialize() })
+            # Don't hold on to a database connection while waiting
+            db.session.close()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not notifier.wait(game_id, notified_version, remaining):
+                return "", 204
+
+@app.route("/api/games", methods=["GET"])
+def list_games():
+    """
+    Games with `status` ("waiting" by default), newest first. Pass the `next` of a
+    page as `before` to get the following one.
+    """
+    status = request.args.get("status", "waiting")
+    if status not in models.GAME_STATUSES:
+        return { "error": "invalid_status" }, 400
+    try:
+        limit = int(request.args.get("limit", lobby.DEFAULT_LIMIT))
+        before = request.args.get("before")
+        before_id = int(before) if before is not None else None
+    except ValueError:
+        return { "error": "invalid_page" }, 400
+    if not 1 <= limit <= lobby.MAX_LIMIT:
+        return { "error": "invalid_page" }, 400
+
+    with app.app_context():
+        return json_response(lobby.list_games(status, before_id, limit))
 
 @app.route("/api/games", methods=["POST"])
 def create_game():
-    inputs = CreateGameInputs(request)
-    if not inputs.validate():
-        return { "errors": inputs.errors }, 400
+    with span("validation"):
+        errors = validate_create_game(request.json)
+    if errors:
+        return { "errors": errors }, 400
 
     with app.app_context():
         game = models.Game()
-        db.session.add(game)
-        db.session.flush()
-        player = models.Player(user_id=request.json["player_id"],
-                               game_id=game.id,
-                               game_player_index=game.player_count())
-        db.session.add(player)
-        db.session.commit()
-        return jsonify(game.serialize()), 201
+        game.add_player(request.json["player_id"])
+        with span("db"):
+            db.session.add(game)
+            db.session.commit()
+        return json_response(game.serialize(), 201)
 
 @app.route("/api/games/<int:game_id>/join", methods=["POST"])
 def join_game(game_id: int):
-    inputs = JoinGameInputs(request)
-    if not inputs.validate():
-        return { "errors": inputs.errors }, 400
+    with span("validation"):
+        errors = validate_join_game(request.json)
+    if errors:
+        return { "errors": errors }, 400
 
     with app.app_context():
-        game = models.Game.query.get(game_id)
+        # Locked so that concurrent joins don't get the same `game_player_index`
+        with span("db"):
+            game = models.Game.load_with_players(game_id, for_update=True)
         if not game:
             return resource_not_found(resource="game", resource_id=game_id)
         if not game.is_waiting():
             return { "error": "game_already_started" }, 400
 
         player_id = request.json["player_id"]
-        player_exists = db.session.query(models.Player.id).\
-            filter_by(user_id=player_id, game_id=game_id).first()
-        if player_exists:
+        if game.find_player(player_id):
             return { "error": "player_id_already_joined" }, 400
+        if game.player_count() >= MAX_PLAYERS:
+            return { "error": "game_full" }, 400
+
+        player = game.add_player(player_id)
+        with span("db"):
+            db.session.commit()
+        notifier.notify(game_id)
+        return json_response(player.serialize(), 201)
+
+@app.route("/api/games/bulk", methods=["POST"])
+def create_games():
+    """
+    Creates a game for each list of player ids, with the seats in that order, and
+    starts them if `start` is set. All games are created in one transaction.
+    """
+    with span("validation"):
+        errors = validate_create_games(request.json)
+    if errors:
+        return { "errors": errors }, 400
+
+    start = request.json.get("start", False)
+    if start and any(len(player_ids) < 2 for player_ids in request.json["games"]):
+        return { "error": "need_at_least_two_players" }, 400
+
+    with app.app_context():
+        games = list(models.Game.with_players(player_ids) for player_ids in request.json["games"])
+        create_games_in_one_transaction(games, start)
+        return json_response({ "games": list(game.serialize() for game in games) }, 201)
+
+@app.route("/api/games/<int:game_id>/rematch", methods=["POST"])
+def rematch_game(game_id: int):
+    """
+    A new game with the same seats as a finished one, which may have been archived.
+    """
+    body = request.get_json(silent=True) or {}
+    with span("validation"):
+        errors = validate_rematch(body)
+    if errors:
+        return { "errors": errors }, 400
 
-        player = models.Player(user_id=player_id,
-                               game_id=game_id,
-                               game_player_index=game.player_count())
-        db.session.add(player)
+    with app.app_context():
+        with span("db"):
+            game = models.Game.load_with_players(game_id)
+            archived = models.ArchivedGame.query.get(game_id) if not game else None
+        if game:
+            status, player_ids = game.status, list(p.user_id for p in game.players)
+        elif archived:
+            status, player_ids = archived.status, archived.game["player_ids"]
+        else:
+            return resource_not_found(resource="game", resource_id=game_id)
+        if status != "finished":
+            return { "error": "game_not_finished" }, 400
+
+        rematch = models.Game.with_players(player_ids)
+        create_games_in_one_transaction([rematch], body.get("start", False))
+        return json_response(rematch.serialize(), 201)
+
+def create_games_in_one_transaction(games: list[models.Game], start: bool):
+    """
+    The games and their players are each inserted in a single batch, and so are
+    the starting snapshots.
+    """
+    for game in games:
+        if start:
+            game.start()
+    with span("db"):
+        db.session.add_all(games)
+        if start:
+            # The snapshots need the games' ids
+            db.session.flush()
+            db.session.add_all(models.GameSnapshot(game.id, move_count=0, state=game.to_state()) for game in games)
         db.session.commit()
-        return jsonify(player.serialize()), 201
+    if start:
+        # For the turn timer
+        for game in games:
+            notifier.notify(game.id)
 
 # TODO: Only game leader can start the game
-@app.route("/api/games/<game_id>/start", methods=["POST"])
-def start_game(game_id: str):
+@app.route("/api/games/<int:game_id>/start", methods=["POST"])
+def start_game(game_id: int):
     with app.app_context():
-        game = models.Game.query.get(game_id)
+        with span("db"):
+            game = models.Game.load_with_players(game_id, for_update=True)
         if not game:
             return resource_not_found(resource="game", resource_id=game_id)
         if not game.is_waiting():
@@ -157,59 +358,154 @@ def start_game(game_id: str):
             return { "error": "need_at_least_two_players" }, 400
 
         game.start()
-        db.session.commit()
+        with span("db"):
+            # The state moves are replayed from
+            db.session.add(models.GameSnapshot(game.id, move_count=0, state=game.to_state()))
+            db.session.commit()
+        notifier.notify(game.id)
+        if any(p.autoplay for p in game.players):
+            autoplayer.schedule(game.id)
         return {}, 200
 
-@app.route("/api/games/<game_id>/play", methods=["POST"])
-def play_game_turn(game_id: str):
-    inputs = PlayTurnInputs(request)
-    if not inputs.validate():
-        return { "errors": inputs.errors }, 400
+@app.route("/api/games/<int:game_id>/play", methods=["POST"])
+def play_game_turn(game_id: int):
+    with span("validation"):
+        errors = validate_play_turn(request.json)
+    if errors:
+        return { "errors": errors }, 400
 
-    with app.app_context():
-        game = models.Game.query.get(game_id)
-        if not game:
+    with app.app_context(), game_storage.open(game_id) as stored:
+        if not stored:
             return resource_not_found(resource="game", resource_id=game_id)
-        if game.is_waiting():
+        if stored.is_waiting():
             return { "error": "game_not_started" }, 400
+        state = stored.state
+        assert state is not None
 
         player_id = request.json["player_id"]
-        player = models.Player.query.filter_by(user_id=player_id, game_id=game_id).first()
-        if not player:
+        player_no = stored.player_no(player_id)
+        if player_no is None:
             return resource_not_found(resource="player", resource_id=player_id)
 
-        move = request.json["move"]
-        card_value = request.json["card_value"]
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key and idempotency_key == stored.last_move_key:
+            # Retry of a move that has already been applied
+            return json_response({
+                "game": stored.serialize(),
+                "result": TurnResult.SUCCESS.name,
+                "events": [],
+                "replayed": True,
+            })
 
-        result, events = play_turn(
-            game,
-            player,
-            move=Move[move],
-            card=card_value,
-        )
-        db.session.commit()
+        expected_turn_number = request.json.get("turn_number")
+        if expected_turn_number is not None and expected_turn_number != state.turn_no:
+            return turn_conflict()
 
-        if result == TurnResult.SUCCESS:
-            return jsonify({
-                "game": game.serialize(),
-                "result": result.name,
-                "events": list(ev.name for ev in events),
-            })
-        else:
+        move = Move[request.json["move"]]
+        card_values = played_card_values(request.json)
+        if move == Move.PLAY and not card_values:
+            return { "error": "card_values_required" }, 400
+
+        with span("logic"):
+            result, events = stored.play_turn(player_no, move=move, cards=Hand.from_cards(card_values))
+        if result != TurnResult.SUCCESS:
             return { "error": result.name, "result": result.name }, 400
 
+        stored.last_move_key = idempotency_key
+        try:
+            game_storage.save(stored)
+        except Conflict:
+            return turn_conflict()
+        autoplayer.after_turn(stored)
+
+        return json_response({
+            "game": stored.serialize(),
+            "result": result.name,
+            "events": list(ev.name for ev in events),
+        })
+
+def played_card_values(body) -> list[int]:
+    """
+    `card_values`, or the single `card_value` that clients sent before plays could
+    have several cards. Validation lets through integral floats such as 5.0, which
+    are converted so that they can index `Hand.CARD_BITS`.
+    """
+    if "card_values" in body:
+        return [int(value) for value in body["card_values"]]
+    if "card_value" in body:
+        return [int(body["card_value"])]
+    return []
+
+@app.route("/api/games/<int:game_id>/players/<player_id>/hint", methods=["GET"])
+def get_hint(game_id: int, player_id: str):
+    """
+    The move `game.search` would play for the player, using only what they can
+    see. Answers within `SEARCH_BUDGET_MS`, or with the lowest playable card when
+    the search workers are busy.
+    """
+    with app.app_context():
+        with game_storage.open(game_id) as stored:
+            if not stored:
+                return resource_not_found(resource="game", resource_id=game_id)
+            if stored.is_waiting():
+                return { "error": "game_not_started" }, 400
+            player_no = stored.player_no(player_id)
+            if player_no is None:
+                return resource_not_found(resource="player", resource_id=player_id)
+            assert stored.state is not None
+            state = stored.state.copy()
+        # Don't hold on to a database connection while searching
+        db.session.close()
+
+    if state.current_player_no != player_no or state.is_finished():
+        return { "error": TurnResult.WRONG_PLAYER.name }, 400
+    with span("logic"):
+        hint = choose_move(state, player_no)
+    return json_response(hint.serialize())
+
+@app.route("/api/games/<int:game_id>/players/<player_id>/autoplay", methods=["POST"])
+def set_autoplay(game_id: int, player_id: str):
+    """
+    Turns on or off the server playing the player's turns, for instance when they
+    have disconnected.
+    """
+    with span("validation"):
+        errors = validate_set_autoplay(request.json)
+    if errors:
+        return { "errors": errors }, 400
+
+    with app.app_context(), game_storage.open(game_id) as stored:
+        if not stored:
+            return resource_not_found(resource="game", resource_id=game_id)
+        player_no = stored.player_no(player_id)
+        if player_no is None:
+            return resource_not_found(resource="player", resource_id=player_id)
+
+        stored.autoplay[player_no] = request.json["enabled"]
+        try:
+            game_storage.save(stored)
+        except Conflict:
+            return turn_conflict()
+        autoplayer.after_turn(stored)
+        return json_response({ "player_id": player_id, "autoplay": stored.autoplay[player_no] })
+
 @app.route("/api/games/<game_id>/players/<player_id>", methods=["GET"])
 def get_player(game_id: str, player_id: str):
     with app.app_context():
-        game = models.Game.query.get(game_id)
+        with span("db"):
+            game = models.Game.query.get(game_id)
         if not game:
             return resource_not_found(resource="game", resource_id=game_id)
 
-        player = models.Player.query.filter_by(user_id=player_id, game_id=game_id).first()
-        if not player:
-            return resource_not_found(resource="player", resource_id=player_id)
+        def build_body():
+            with span("db"):
+                player = models.Player.query.filter_by(user_id=player_id, game_id=game_id).first()
+            if not player:
+                return resource_not_found(resource="player", resource_id=player_id)
+            return json_response(player.serialize_with_playable_cards(game.last_card, game.last_card_count))
 
-        return player.serialize_with_playable_cards(game.last_card), 200
+        # A player's view only changes when the game does, so the game's ETag is used
+        return conditional_response(game_etag(game), build_body)
 
 if __name__ == '__main__':
     app.run(debug=True, host="0.0.0.0")
@@ -0,0 +1,101 @@
+"""
+Moves finished games, and waiting games nobody has joined in a while, out of the
+live tables into `archived_game`, so that the live tables only hold the games
+being played. Archived games can still be read with `GET /api/games/<id>`.
+
+    python archive.py              # archive once
+    python archive.py --every 600  # keep archiving, as the `archiver` process
+
+Finished games are kept live for a while, so that players still see the end of
+the game.
+"""
+from typing import Any
+from datetime import timedelta
+import argparse
+import logging
+import os
+import time
+
+from sqlalchemy import delete, or_, and_ # type: ignore
+from sqlalchemy.orm import selectinload # type: ignore
+
+from models import db, utcnow
+import models
+import hand as Hand
+
+logger = logging.getLogger(__name__)
+
+FINISHED_AFTER = timedelta(seconds=int(os.environ.get("ARCHIVE_FINISHED_AFTER_SECONDS", "3600")))
+ABANDONED_AFTER = timedelta(seconds=int(os.environ.get("ARCHIVE_ABANDONED_AFTER_SECONDS", "86400")))
+BATCH_SIZE = 500
+
+def archive_batch(batch_size: int = BATCH_SIZE) -> int:
+    """
+    Archives up to `batch_size` games in one transaction, and returns how many.
+    Games locked by a request are skipped until the next batch.
+    """
+    now = utcnow()
+    games = models.Game.query.\
+        options(selectinload(models.Game.players)).\
+        filter(or_(
+            and_(models.Game.status == "finished", models.Game.updated_at < now - FINISHED_AFTER),
+            and_(models.Game.status == "waiting", models.Game.updated_at < now - ABANDONED_AFTER),
+        )).\
+        order_by(models.Game.id).\
+        limit(batch_size).\
+        with_for_update(of=models.Game, skip_locked=True).\
+        all()
+    if not games:
+        db.session.rollback()
+        return 0
+
+    game_ids = list(game.id for game in games)
+    moves: dict[int, list[list[Any]]] = {game_id: [] for game_id in game_ids}
+    for move in models.GameMove.query.\
+            filter(models.GameMove.game_id.in_(game_ids)).\
+            order_by(models.GameMove.game_id, models.GameMove.turn_number):
+        cards = move.played_cards()
+        moves[move.game_id].append([move.player_index, list(Hand.cards(cards)) if cards else None])
+
+    for game in games:
+        status = "finished" if game.status == "finished" else "abandoned"
+        db.session.add(models.ArchivedGame(game, status, moves[game.id], archived_at=now))
+    db.session.flush()
+
+    for model in (models.GameMove, models.GameSnapshot, models.Player):
+        db.session.execute(delete(model).where(model.game_id.in_(game_ids)))
+    db.session.execute(delete(models.Game).where(models.Game.id.in_(game_ids)))
+    db.session.commit()
+    # The deleted games are still in the session
+    db.session.expunge_all()
+    return len(games)
+
+def archive_all() -> int:
+    archived = 0
+    while True:
+        count = archive_batch()
+        archived += count
+        if count < BATCH_SIZE:
+            return archived
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--every", type=float, help="Seconds between runs. Runs once if not given.")
+    args = parser.parse_args()
+
+    from app import app
+    while True:
+        with app.app_context():
+            try:
+                logger.info("Archived %d games", archive_all())
+            except Exception:
+                if not args.every:
+                    raise
+                logger.exception("Failed to archive games")
+                db.session.rollback()
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+if __name__ == "__main__":
+    main()
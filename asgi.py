@@ -0,0 +1,147 @@
+"""
+Serves the app over ASGI, so that idle watchers don't each hold a worker thread:
+
+    uvicorn asgi:application --host 0.0.0.0 --port $PORT  # the `web` process
+
+Long-polls of `/api/games/<id>/updates` wait on the event loop, checking the game
+with an asyncpg connection pool. Once the game has changed, and for every other
+route, the request is handed to the Flask app, which runs in a pool of
+`WSGI_THREADS` threads.
+"""
+from typing import Optional
+from urllib.parse import parse_qs
+import asyncio
+import os
+import re
+
+import asyncpg # type: ignore
+from a2wsgi import WSGIMiddleware # type: ignore
+
+from app import app, notifier, UPDATES_TIMEOUT_SECONDS
+from config import libpq_url
+from models import format_state_key
+
+UPDATES_PATH = re.compile(r"^/api/games/(\d+)/updates$")
+
+# Flask requests served at once. More than the database pool's connections only
+# makes requests wait for a connection.
+WSGI_THREADS = int(os.environ.get("WSGI_THREADS", "10"))
+
+class Watchers:
+    """
+    The coroutines waiting for each game to change.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.events: dict[int, set[asyncio.Event]] = {}
+
+    def add(self, game_id: int) -> asyncio.Event:
+        event = asyncio.Event()
+        self.events.setdefault(game_id, set()).add(event)
+        return event
+
+    def remove(self, game_id: int, event: asyncio.Event):
+        events = self.events.get(game_id)
+        if events is not None:
+            events.discard(event)
+            if not events:
+                del self.events[game_id]
+
+    def notify_threadsafe(self, game_id: int):
+        # Notifications arrive on the Flask threads, or the Postgres listener's
+        self.loop.call_soon_threadsafe(self.wake, game_id)
+
+    def wake(self, game_id: int):
+        for event in self.events.pop(game_id, ()):
+            event.set()
+
+class Application:
+    def __init__(self, flask_app, threads: int = WSGI_THREADS):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=threads)
+        self.pool: Optional[asyncpg.Pool] = None
+        self.watchers: Optional[Watchers] = None
+        self.start_lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = UPDATES_PATH.match(scope["path"])
+            if match and not await self.wait_for_update(int(match[1]), scope):
+                await send_no_content(send)
+                return
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.pool:
+                    await self.pool.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def start(self):
+        async with self.start_lock:
+            if self.pool:
+                return
+            self.pool = await asyncpg.create_pool(
+                libpq_url(self.flask_app.config["SQLALCHEMY_DATABASE_URI"]),
+                min_size=int(os.environ.get("ASYNC_DB_POOL_MIN_SIZE", "2")),
+                max_size=int(os.environ.get("ASYNC_DB_POOL_MAX_SIZE", "10")),
+            )
+            self.watchers = Watchers(asyncio.get_running_loop())
+            notifier.add_listener(self.watchers.notify_threadsafe)
+
+    async def state_key(self, game_id: int) -> Optional[str]:
+        assert self.pool
+        row = await self.pool.fetchrow(
+            "SELECT turn_number, status, num_players, row_version FROM game WHERE id = $1",
+            game_id,
+        )
+        if not row:
+            return None
+        return format_state_key(row["turn_number"], row["status"], row["num_players"], row["row_version"])
+
+    async def wait_for_update(self, game_id: int, scope) -> bool:
+        """
+        Waits until the game differs from the `version` the client last saw.
+        Returns False if it didn't change before the timeout.
+        """
+        await self.start()
+        assert self.watchers
+        since = parse_qs(scope["query_string"].decode()).get("version", [""])[0]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + UPDATES_TIMEOUT_SECONDS
+        while True:
+            # Registered before reading the game, so that a change committed in
+            # between is not missed
+            event = self.watchers.add(game_id)
+            try:
+                if await self.state_key(game_id) != since:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.watchers.remove(game_id, event)
+
+async def send_no_content(send):
+    await send({
+        "type": "http.response.start",
+        "status": 204,
+        # Same as flask_cors sets for /api/*
+        "headers": [(b"access-control-allow-origin", b"*")],
+    })
+    await send({"type": "http.response.body", "body": b""})
+
+application = Application(app)
@@ -0,0 +1,120 @@
+"""
+Plays the turns of seats that have autoplay on, such as players who have
+disconnected, with the moves `game.search` picks.
+
+Turns are played in a background thread after a turn is saved, so that the
+request that saved it doesn't wait for the search. Turns still queued when a
+process stops are picked up again by `Autoplayer.recover`, which the process
+running the turn timer calls when it starts, see `timeouts.py`.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+from sqlalchemy import Select, and_, select # type: ignore
+
+from game.rules import TurnResult
+from game.search import choose_move
+from models import db
+from storage import GameStorage, StoredGame, Conflict
+import models
+
+logger = logging.getLogger(__name__)
+
+def waiting_on_autoplay() -> Select:
+    """
+    The ids of the games being played whose current seat has autoplay on. Found
+    with `player_autoplay_idx`, which only holds those seats.
+    """
+    return select(models.Game.id).\
+        join(models.Player, and_(
+            models.Player.game_id == models.Game.id,
+            models.Player.game_player_index == models.Game.current_player_index,
+        )).\
+        where(models.Player.autoplay, models.Game.status == "playing")
+
+class Autoplayer:
+    def __init__(self, app, storage: GameStorage):
+        self.app = app
+        self.storage = storage
+        # One thread, since the searches are bounded by `search.SEARCH_WORKERS` anyway
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autoplay")
+        # Games waiting for the thread, which only need to be queued once
+        self.pending: set[int] = set()
+        self.lock = threading.Lock()
+
+    def after_turn(self, stored: StoredGame):
+        """
+        Call after saving a change to a game. Plays the next turns if they are
+        autoplay turns.
+        """
+        if stored.is_autoplay_turn():
+            self.schedule(stored.game_id)
+
+    def recover(self):
+        """
+        Queues every game waiting on an autoplay seat, from the background thread.
+        """
+        self.executor.submit(self.queue_waiting)
+
+    def queue_waiting(self):
+        with self.app.app_context():
+            try:
+                game_ids = db.session.scalars(waiting_on_autoplay()).all()
+            except Exception:
+                logger.exception("Failed to read the games waiting on autoplay")
+                return
+            finally:
+                db.session.close()
+        logger.info("Recovered %d games waiting on autoplay", len(game_ids))
+        for game_id in game_ids:
+            self.schedule(game_id)
+
+    def schedule(self, game_id: int):
+        with self.lock:
+            if game_id in self.pending:
+                return
+            self.pending.add(game_id)
+        self.executor.submit(self.play, game_id)
+
+    def play(self, game_id: int):
+        with self.lock:
+            # Changes saved from now on queue the game again
+            self.pending.discard(game_id)
+        with self.app.app_context():
+            try:
+                while self.play_turn(game_id):
+                    pass
+            except Exception:
+                logger.exception("Failed to autoplay game %d", game_id)
+                db.session.rollback()
+
+    def play_turn(self, game_id: int) -> bool:
+        """
+        Plays the current turn if it is an autoplay turn. Returns whether the game
+        should be looked at again.
+        """
+        with self.storage.open(game_id) as stored:
+            if not stored or not stored.is_autoplay_turn():
+                return False
+            assert stored.state is not None
+            state = stored.state.copy()
+        # Don't hold on to a database connection while searching
+        db.session.close()
+
+        player_no = state.current_player_no
+        hint = choose_move(state, player_no)
+        with self.storage.open(game_id) as stored:
+            if not stored or not stored.state or stored.state.turn_no != state.turn_no:
+                # Someone else played in the meantime
+                return True
+            result, _ = stored.play_turn(player_no, hint.move, hint.cards)
+            if result != TurnResult.SUCCESS:
+                logger.error("Autoplay of game %d picked an illegal move: %s", game_id, result.name)
+                return False
+            stored.last_move_key = None
+            try:
+                self.storage.save(stored)
+            except Conflict:
+                pass
+        return True
@@ -0,0 +1,86 @@
+"""
+How many clients can wait for updates to one game at once. Opens `--watchers`
+long-polls on a new game, has a player join it, and counts the watchers that hear
+about the join within `--deadline` seconds. Run it against each server:
+
+    make server         # or: make server-async
+    python -m bench.connections --url http://localhost:5000 --watchers 1000
+
+With the threaded server, watchers beyond its thread count queue behind the
+others; with `asgi.py`, they all wait on the event loop.
+"""
+from typing import Optional
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+async def request(host: str, port: int, method: str, path: str, body: Optional[dict] = None) -> tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection(host, port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: close\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), content
+
+async def watch(host: str, port: int, game_id: int, version: str) -> Optional[float]:
+    """
+    When this watcher heard about an update, or None if it got none.
+    """
+    try:
+        status, _ = await request(host, port, "GET", f"/api/games/{game_id}/updates?version={version}")
+    except OSError:
+        return None
+    return time.monotonic() if status == 200 else None
+
+async def run(url: str, num_watchers: int, settle: float, deadline: float) -> dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "localhost", parts.port or 80
+
+    status, content = await request(host, port, "POST", "/api/games", {"player_id": "bench-0"})
+    assert status == 201, content
+    game_id = json.loads(content)["id"]
+    # Without a version, returns the current one straight away
+    status, content = await request(host, port, "GET", f"/api/games/{game_id}/updates")
+    assert status == 200, content
+    version = json.loads(content)["version"]
+
+    watchers = [asyncio.create_task(watch(host, port, game_id, version)) for _ in range(num_watchers)]
+    # Gives the watchers time to connect and start waiting
+    await asyncio.sleep(settle)
+
+    joined_at = time.monotonic()
+    status, content = await request(host, port, "POST", f"/api/games/{game_id}/join", {"player_id": "bench-1"})
+    assert status == 201, content
+
+    done, pending = await asyncio.wait(watchers, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    latencies = sorted(t - joined_at for t in (task.result() for task in done) if t is not None)
+    return {
+        "watchers": num_watchers,
+        "notified": len(latencies),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--watchers", type=int, default=200)
+    parser.add_argument("--settle", type=float, default=2.0)
+    parser.add_argument("--deadline", type=float, default=5.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.watchers, args.settle, args.deadline)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Plays `--games` full games at once against a running server, each with its own
+connection and a random think time before every move, and reports throughput and
+latency percentiles per route as JSON. Each game creates, joins and starts a
+game, then for every turn reads the player's snapshot, polls the game as another
+player would, and plays the lowest playable card.
+
+    make server
+    python -m bench.load --games 50 --output baseline.json
+
+`--spawn` starts the server itself, and stops it afterwards:
+
+    python -m bench.load --spawn "gunicorn -w 4 -b 127.0.0.1:5000 app:app"
+
+Queries per request are read from the `X-Query-Count` header. With `--baseline`,
+exits with an error if any route's p95 got more than `--tolerance` slower, or any
+route makes more queries per request, than in the baseline.
+"""
+from typing import Any, Optional
+import argparse
+import http.client
+import json
+import random
+import shlex
+import subprocess
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Moves that take a snapshot make a few more queries, so the average varies a
+# little with how long the games were
+QUERY_SLACK = 0.1
+
+class Recorder:
+    """
+    Latencies and query counts, by route.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {}
+        self.queries: dict[str, list[int]] = {}
+        self.errors: dict[str, int] = {}
+
+    def record(self, route: str, seconds: float, status: int, queries: Optional[int]):
+        with self.lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if queries is not None:
+                self.queries.setdefault(route, []).append(queries)
+            if status >= 400:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            queries = self.queries.get(route, [])
+            routes[route] = {
+                "requests": len(latencies),
+                "errors": self.errors.get(route, 0),
+                "p50_ms": percentile_ms(latencies, 0.50),
+                "p95_ms": percentile_ms(latencies, 0.95),
+                "p99_ms": percentile_ms(latencies, 0.99),
+                "max_ms": round(latencies[-1] * 1000, 2),
+                "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+            }
+        return routes
+
+def percentile_ms(sorted_seconds: list[float], fraction: float) -> float:
+    index = min(len(sorted_seconds) - 1, int(fraction * len(sorted_seconds)))
+    return round(sorted_seconds[index] * 1000, 2)
+
+class Client:
+    """
+    One keep-alive connection, which records every request under its route.
+    """
+    def __init__(self, url: str, recorder: Recorder):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname or "localhost", parts.port or 80, timeout=30)
+        self.recorder = recorder
+
+    def request(self,
+                route: str,
+                method: str,
+                path: str,
+                body: Optional[dict] = None,
+                headers: Optional[dict[str, str]] = None) -> tuple[int, Any, http.client.HTTPResponse]:
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        start = time.perf_counter()
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        content = response.read()
+        elapsed = time.perf_counter() - start
+        queries = response.getheader("X-Query-Count")
+        self.recorder.record(route, elapsed, response.status, int(queries) if queries is not None else None)
+        return response.status, json.loads(content) if content else None, response
+
+    def close(self):
+        self.connection.close()
+
+def play_game(url: str, game_no: int, num_players: int, think: float, rng: random.Random, recorder: Recorder) -> int:
+    """
+    Plays one game to the end, and returns the number of turns played.
+    """
+    client = Client(url, recorder)
+    try:
+        player_ids = list(f"load-{game_no}-{seat}" for seat in range(num_players))
+        status, game, _ = client.request("POST /api/games", "POST", "/api/games", {"player_id": player_ids[0]})
+        assert status == 201, game
+        game_id = game["id"]
+        for player_id in player_ids[1:]:
+            status, body, _ = client.request(
+                "POST /api/games/<id>/join", "POST", f"/api/games/{game_id}/join", {"player_id": player_id})
+            assert status == 201, body
+        status, body, _ = client.request("POST /api/games/<id>/start", "POST", f"/api/games/{game_id}/start")
+        assert status == 200, body
+
+        turns = 0
+        etag: Optional[str] = None
+        while True:
+            status, game, _ = client.request("GET /api/games/<id>", "GET", f"/api/games/{game_id}")
+            assert status == 200, game
+            if game["status"] == "finished":
+                return turns
+            player_id = game["current_player_id"]
+            status, snapshot, _ = client.request(
+                "GET /api/games/<id>/snapshot", "GET", f"/api/games/{game_id}/snapshot?player_id={player_id}")
+            assert status == 200, snapshot
+
+            # Another player polling, who usually already has the latest game
+            _, _, response = client.request(
+                "GET /api/games/<id> (poll)", "GET", f"/api/games/{game_id}",
+                headers={"If-None-Match": etag} if etag else None)
+            etag = response.getheader("ETag") or etag
+
+            time.sleep(rng.uniform(0, 2 * think))
+            playable = [card for card in snapshot["you"]["hand"] if card["playable"]]
+            if playable:
+                body = {"player_id": player_id, "move": "PLAY", "card_value": playable[0]["value"]}
+            else:
+                body = {"player_id": player_id, "move": "PASS", "card_value": 0}
+            status, result, _ = client.request("POST /api/games/<id>/play", "POST", f"/api/games/{game_id}/play", body)
+            assert status == 200, result
+            turns += 1
+    finally:
+        client.close()
+
+def run(url: str, num_games: int, num_players: int, think: float, seed: int) -> dict[str, Any]:
+    recorder = Recorder()
+    turns: list[int] = []
+    failures: list[str] = []
+
+    def play(game_no: int):
+        try:
+            turns.append(play_game(url, game_no, num_players, think, random.Random(seed + game_no), recorder))
+        except Exception as e:
+            failures.append(repr(e))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=play, args=(game_no,)) for game_no in range(num_games)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    requests = sum(len(latencies) for latencies in recorder.latencies.values())
+    return {
+        "config": {"games": num_games, "players": num_players, "think_ms": think * 1000, "seed": seed},
+        "seconds": round(elapsed, 2),
+        "games_finished": len(turns),
+        "failures": failures,
+        "requests_per_second": round(requests / elapsed, 1),
+        "turns_per_second": round(sum(turns) / elapsed, 1),
+        "routes": recorder.summary(),
+    }
+
+def regressions(result: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    found = []
+    for route, before in baseline["routes"].items():
+        after = result["routes"].get(route)
+        if not after:
+            continue
+        if after["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{route}: p95 {before['p95_ms']}ms -> {after['p95_ms']}ms")
+        if (before["queries_per_request"] is not None and after["queries_per_request"] is not None
+                and after["queries_per_request"] > before["queries_per_request"] + QUERY_SLACK):
+            found.append(f"{route}: {before['queries_per_request']} -> {after['queries_per_request']} queries per request")
+    return found
+
+def wait_until_healthy(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    parts = urlsplit(url)
+    while True:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname or "localhost", parts.port or 80, timeout=1)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Server at {url} didn't start within {timeout} seconds")
+        time.sleep(0.2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--games", type=int, default=20, help="Games played at once")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--think-ms", type=float, default=50, help="Average think time before each move")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", help="Command that starts the server, which is stopped afterwards")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--baseline", help="Results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 slowdown, as a fraction")
+    args = parser.parse_args()
+
+    server = subprocess.Popen(shlex.split(args.spawn)) if args.spawn else None
+    try:
+        wait_until_healthy(args.url, timeout=30)
+        result = run(args.url, args.games, args.players, args.think_ms / 1000, args.seed)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if result["failures"]:
+        raise SystemExit(f"{len(result['failures'])} games failed")
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(result, json.load(f), args.tolerance)
+        if found:
+            raise SystemExit("Regressions:\n" + "\n".join(found))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Serialized player responses per second, before and after the precomputed card
+tables and `serialize.dumps`:
+
+    python -m bench.serialize
+"""
+from typing import Any, Optional
+import json
+import random
+import timeit
+
+from flask import Flask, jsonify
+
+from models import Player
+from serialize import dumps
+import card as Card
+import hand as Hand
+
+ITERATIONS = 20000
+
+def legacy_serialize_card(card: int) -> dict[str, Any]:
+    return {
+        "value": card,
+        "rank": Card.rank(card),
+        "suit": Card.suit(card),
+        "description": f"{Card.FACE_RANKS[Card.rank(card)]} OF {Card.FACE_SUITS[Card.suit(card)]}",
+    }
+
+def legacy_serialize_with_playable_cards(player: Player, hand: list[int], top_card: Optional[int]) -> dict[str, Any]:
+    serialized: dict[str, Any] = {
+        "id": player.id,
+        "game_id": player.game_id,
+        "game_player_index": player.game_player_index,
+        "user_id": player.user_id,
+        "hand": [legacy_serialize_card(c) for c in hand],
+        "status": player.status,
+    }
+    for card in serialized["hand"]:
+        card["playable"] = (top_card is None) or Card.is_playable(card["value"], top_card)
+    return serialized
+
+def main():
+    app = Flask(__name__)
+    cards = random.sample(range(52), 13)
+    top_card = random.choice(range(52))
+    player = Player(user_id="amey", game_id=1, game_player_index=0)
+    player.hand_mask = Hand.from_cards(cards)
+
+    with app.app_context():
+        before = timeit.timeit(
+            lambda: jsonify(legacy_serialize_with_playable_cards(player, cards, top_card)).get_data(),
+            number=ITERATIONS,
+        )
+    after = timeit.timeit(
+        lambda: dumps(player.serialize_with_playable_cards(top_card)),
+        number=ITERATIONS,
+    )
+    print(json.dumps({
+        "iterations": ITERATIONS,
+        "before_per_second": round(ITERATIONS / before),
+        "after_per_second": round(ITERATIONS / after),
+        "speedup": round(before / after, 1),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Cost of validating a play request body, before (a `flask_inputs` form built on
+every request, running jsonschema) and after (the checks compiled by
+`validation.py`):
+
+    python -m bench.validation
+
+The "before" rows need flask-inputs, which the app no longer depends on.
+"""
+from typing import Any
+import json
+import timeit
+
+import jsonschema # type: ignore
+from flask import Flask, request
+
+from validation import PLAY_TURN_SCHEMA, validate_play_turn
+
+ITERATIONS = 2000
+
+VALID = {"player_id": "amey", "move": "PLAY", "card_values": [12, 25], "turn_number": 3}
+INVALID = {"player_id": "amey", "move": "PLAY", "card_value": 52}
+
+def microseconds(function, iterations: int) -> float:
+    return round(timeit.timeit(function, number=iterations) / iterations * 1e6, 2)
+
+def bench_flask_inputs(app: Flask, body: dict[str, Any]) -> Any:
+    try:
+        from flask_inputs import Inputs # type: ignore
+        from flask_inputs.validators import JsonSchema # type: ignore
+    except ImportError:
+        return None
+
+    class PlayTurnInputs(Inputs):
+        json = [JsonSchema(schema=PLAY_TURN_SCHEMA)]
+
+    with app.test_request_context(json=body):
+        return microseconds(lambda: PlayTurnInputs(request).validate(), ITERATIONS)
+
+def bench_jsonschema(body: dict[str, Any]) -> float:
+    def validate():
+        try:
+            jsonschema.validate(body, PLAY_TURN_SCHEMA)
+        except jsonschema.ValidationError:
+            pass
+    return microseconds(validate, ITERATIONS)
+
+def main():
+    app = Flask(__name__)
+    results = {}
+    for name, body in (("valid", VALID), ("invalid", INVALID)):
+        results[name] = {
+            "flask_inputs_us": bench_flask_inputs(app, body),
+            "jsonschema_us": bench_jsonschema(body),
+            "compiled_us": microseconds(lambda: validate_play_turn(body), ITERATIONS),
+        }
+    print(json.dumps({"iterations": ITERATIONS, **results}, indent=2))
+
+if __name__ == "__main__":
+    main()
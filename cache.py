@@ -0,0 +1,185 @@
+from typing import Callable, Iterator, Optional
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+from sqlalchemy.orm import joinedload # type: ignore
+
+from models import db
+from sqlalchemy.exc import IntegrityError # type: ignore
+from sqlalchemy.orm.exc import StaleDataError # type: ignore
+
+from storage import GameStorage, StoredGame, Conflict, stored_from_row, apply_to_row, append_new_moves, replay
+from profiling import span
+import models
+
+logger = logging.getLogger(__name__)
+
+class CachedGame:
+    def __init__(self, stored: StoredGame):
+        self.stored = stored
+        self.lock = threading.Lock()
+        self.moves = 0
+        self.persisted_moves = 0
+        # Set once the game is dropped from the cache, after which its rows must
+        # not be written from it
+        self.evicted = False
+
+    def is_dirty(self) -> bool:
+        return self.moves != self.persisted_moves
+
+class GameCache:
+    """
+    Keeps games that are being played in memory. Moves are applied to the cached
+    game and appended to the move log straight away, while the `game` and
+    `player` rows are updated in batches by a background thread. A game that
+    isn't cached is rebuilt from the move log, so no move is lost if the process
+    stops before the rows are updated.
+
+    The cache belongs to a single process, so it must only be used when the app
+    runs as a single worker.
+    """
+    def __init__(self, app, flush_interval: float, on_persisted: Callable[[int], None]):
+        self.app = app
+        self.flush_interval = flush_interval
+        self.on_persisted = on_persisted
+        self.games: dict[int, CachedGame] = {}
+        self.lock = threading.Lock()
+        self.flush_requested = threading.Event()
+        thread = threading.Thread(target=self.write_behind, daemon=True)
+        thread.start()
+
+    def get(self, game_id: int) -> Optional[CachedGame]:
+        """
+        The game if it is being played, loading it from the database if needed.
+        """
+        with self.lock:
+            cached = self.games.get(game_id)
+        if cached:
+            return cached
+
+        game = models.Game.load_with_players(game_id)
+        if not game or game.status != "playing":
+            return None
+        stored = stored_from_row(game)
+        stored.row = None
+        stored.state = replay(game_id) or stored.state
+        cached = CachedGame(stored)
+        with self.lock:
+            # Another request may have loaded the game in the meantime
+            return self.games.setdefault(game_id, cached)
+
+    def evict(self, game_id: int):
+        with self.lock:
+            cached = self.games.pop(game_id, None)
+        if cached:
+            cached.evicted = True
+
+    def mark_dirty(self, cached: CachedGame):
+        # Counts changes to the seats' autoplay flags too
+        cached.moves += 1
+        self.flush_requested.set()
+
+    def write_behind(self):
+        while True:
+            self.flush_requested.wait()
+            self.flush_requested.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to persist cached games")
+                self.flush_requested.set()
+            # Batch up the moves made while waiting
+            time.sleep(self.flush_interval)
+
+    def flush(self):
+        with self.lock:
+            dirty = [cached for cached in self.games.values() if cached.is_dirty()]
+        if not dirty:
+            return
+
+        with self.app.app_context():
+            games = models.Game.query.\
+                options(joinedload(models.Game.players)).\
+                filter(models.Game.id.in_(cached.stored.game_id for cached in dirty)).\
+                all()
+            games_by_id = {game.id: game for game in games}
+            flushed_moves = {}
+            for cached in dirty:
+                with cached.lock:
+                    if cached.evicted:
+                        continue
+                    stored = cached.stored
+                    flushed_moves[stored.game_id] = cached.moves
+                    apply_to_row(games_by_id[stored.game_id], stored)
+            db.session.commit()
+
+        finished = []
+        for cached in dirty:
+            if cached.stored.game_id not in flushed_moves:
+                continue
+            # Under the game's lock, which requests hold until they have saved, so
+            # that a game isn't dropped while its last move is being saved
+            with cached.lock:
+                cached.persisted_moves = flushed_moves[cached.stored.game_id]
+                if cached.stored.state.is_finished() and not cached.is_dirty():
+                    cached.evicted = True
+                    finished.append(cached)
+        with self.lock:
+            for cached in finished:
+                if self.games.get(cached.stored.game_id) is cached:
+                    del self.games[cached.stored.game_id]
+        for cached in dirty:
+            self.on_persisted(cached.stored.game_id)
+
+class CachedStorage(GameStorage):
+    """
+    Plays games in a `GameCache`. Games that aren't being played are read from
+    the database.
+    """
+    def __init__(self, cache: GameCache):
+        self.cache = cache
+
+    @contextmanager
+    def open(self, game_id: int) -> Iterator[Optional[StoredGame]]:
+        with span("db"):
+            cached = self.cache.get(game_id)
+        if cached:
+            with cached.lock:
+                if not cached.evicted:
+                    yield cached.stored
+                    return
+        # Not being played, or dropped from the cache while waiting for it
+        with span("db"):
+            game = models.Game.load_with_players(game_id)
+        yield stored_from_row(game) if game else None
+
+    def save(self, stored: StoredGame):
+        if stored.row is not None:
+            # Not being played, so not cached
+            with span("db"):
+                apply_to_row(stored.row, stored)
+                try:
+                    db.session.commit()
+                except (StaleDataError, IntegrityError):
+                    db.session.rollback()
+                    raise Conflict()
+            return
+        with span("db"):
+            append_new_moves(stored)
+            try:
+                db.session.commit()
+            except Exception as e:
+                # The cached game has already been changed, but the move isn't in
+                # the move log, so the game is read back from the database instead
+                db.session.rollback()
+                self.cache.evict(stored.game_id)
+                if isinstance(e, IntegrityError):
+                    # The game was changed outside of this cache
+                    raise Conflict()
+                raise
+        # Still cached, since the caller holds the game's lock, see `GameCache.flush`
+        with self.cache.lock:
+            cached = self.cache.games[stored.game_id]
+        self.cache.mark_dirty(cached)
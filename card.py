@@ -9,16 +9,30 @@ def rank(card: int) -> int:
 def suit(card: int) -> int:
     return card // 13
 
+# There are only 52 cards, so their descriptions and serialized forms are built once
+DESCRIPTIONS = tuple(f"{FACE_RANKS[rank(c)]} OF {FACE_SUITS[suit(c)]}" for c in range(52))
+SERIALIZED: tuple[dict[str, Union[str, int]], ...] = tuple(
+    {
+        "value": c,
+        "rank": rank(c),
+        "suit": suit(c),
+        "description": DESCRIPTIONS[c],
+    }
+    for c in range(52)
+)
+
+# Indexed by card, then by whether it is playable
+SERIALIZED_PLAYABLE: tuple[tuple[dict[str, Union[str, int, bool]], ...], ...] = tuple(
+    tuple({**SERIALIZED[c], "playable": playable} for playable in (False, True))
+    for c in range(52)
+)
+
 def description(card: int) -> str:
-    return f"{FACE_RANKS[rank(card)]} OF {FACE_SUITS[suit(card)]}"
+    return DESCRIPTIONS[card]
 
 def serialize(card: int) -> dict[str, Union[str, int]]:
-    return {
-        "value": card,
-        "rank": rank(card),
-        "suit": suit(card),
-        "description": description(card),
-    }
+    # Copied, because callers add their own keys
+    return dict(SERIALIZED[card])
 
 def is_playable(card: int, top_card: int) -> bool:
     return rank(card) >= rank(top_card)
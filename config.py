@@ -0,0 +1,30 @@
+"""
+Settings read from the environment, shared by the app and by tools that must not
+import it, such as the migrations.
+"""
+import os
+
+from sqlalchemy.engine import make_url # type: ignore
+
+def database_url() -> str:
+    """
+    `DATABASE_URL`, or a Postgres URL built from `PGUSER`, `PGPASSWORD`, `PGHOST`
+    and `PGDATABASE`.
+    """
+    url = os.environ.get("DATABASE_URL")
+    if url:
+        return url
+    return (
+        "postgresql://" +
+        os.environ["PGUSER"] + ":" +
+        os.environ.get("PGPASSWORD", "") + "@" +
+        os.environ.get("PGHOST", "localhost") + "/" +
+        os.environ["PGDATABASE"]
+    )
+
+def libpq_url(url: str) -> str:
+    """
+    The database URL without the SQLAlchemy driver, such as the `+psycopg2` of
+    `postgresql+psycopg2://`, for psycopg2 and asyncpg, which refuse it.
+    """
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
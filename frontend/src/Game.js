@@ -7,28 +7,56 @@ function Game({ defaultPlayerID, gameID }) {
   const [game, setGame] = useState({ status: "loading" });
   const [playerID, setPlayerID] = useState(defaultPlayerID);
   const [youPlayer, setYouPlayer] = useState({ hand: [] });
+  const [players, setPlayers] = useState([]);
+  // Cards of one rank, to play together
+  const [selected, setSelected] = useState([]);
 
   useEffect(() => {
     document.title = "President!";
-    const interval = setInterval(refreshGame, 2000);
+    let watching = true;
+    watchGame(() => watching);
     return () => {
-      clearInterval(interval);
+      watching = false;
     };
   // eslint-disable-next-line
   }, []);
 
+  // TODO: Find a good fix for this. Because `useEffect` checks referential equality on
+  // `game.player_ids`, the snapshot is fetched again even if the array elements
+  // don't change.
   useEffect(() => {
-    fetch(`${BASE_URL}/games/${gameID}/players/${playerID}`)
+    fetch(`${BASE_URL}/games/${gameID}/snapshot?player_id=${playerID}`)
       .then(handleBadRequest)
-      .then((data) => setYouPlayer(data))
+      .then((data) => {
+        setPlayers(data.players);
+        setYouPlayer(data.you);
+        setSelected([]);
+      })
       .catch((response) => console.log(response));
-  }, [gameID, playerID, game.turn_number]);
+  // eslint-disable-next-line
+  }, [gameID, playerID, game.turn_number, JSON.stringify(game.player_ids)]);
 
-  function refreshGame() {
-    fetch(`${BASE_URL}/games/${gameID}`)
-      .then(handleBadRequest)
-      .then((data) => setGame(data))
-      .catch((response) => console.log(response));
+  // Long-polls the server, which only responds once the game has changed
+  async function watchGame(isWatching) {
+    let version = "";
+    while (isWatching()) {
+      try {
+        const response = await fetch(
+          `${BASE_URL}/games/${gameID}/updates?version=${version}`
+        );
+        if (response.status === 200) {
+          const data = await response.json();
+          version = data.version;
+          setGame(data.game);
+        } else if (response.status !== 204) {
+          console.log(response);
+          await sleep(2000);
+        }
+      } catch (error) {
+        console.log(error);
+        await sleep(2000);
+      }
+    }
   }
 
   function isMyTurn() {
@@ -39,22 +67,48 @@ function Game({ defaultPlayerID, gameID }) {
     return isMyTurn() && card.playable;
   }
 
-  function playTurn(move, card) {
+  function toggleSelected(card) {
     if (!canPlay(card)) {
       return;
     }
+    if (selected.some((c) => c.value === card.value)) {
+      setSelected(selected.filter((c) => c.value !== card.value));
+    } else if (selected.length > 0 && selected[0].rank === card.rank) {
+      setSelected([...selected, card]);
+    } else {
+      // Starts a new selection when picking another rank
+      setSelected([card]);
+    }
+  }
+
+  function isSelected(card) {
+    return selected.some((c) => c.value === card.value);
+  }
+
+  function playTurn(move, cards) {
+    if (!isMyTurn()) {
+      return;
+    }
 
     fetch(`${BASE_URL}/games/${gameID}/play`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        // A double-click sends the same key, so the move is only applied once
+        "Idempotency-Key": `${playerID}-${game.turn_number}`,
+      },
       body: JSON.stringify({
         move: move,
-        card_value: card.value,
+        card_values: cards.map((card) => card.value),
         player_id: playerID,
+        turn_number: game.turn_number,
       }),
     })
       .then(handleBadRequest)
-      .then((data) => setGame(data.game))
+      .then((data) => {
+        setSelected([]);
+        setGame(data.game);
+      })
       .catch((response) => console.log(response));
   }
 
@@ -87,13 +141,12 @@ function Game({ defaultPlayerID, gameID }) {
           ) : (
             <Card rank={-1} displayType={"top-card"} />
           )}
+          {game.last_card_count > 1 && <h3>x {game.last_card_count}</h3>}
         </div>
         <div id="players-section">
           <h2>Players</h2>
           <Players
-            gameID={gameID}
-            playerIds={game.player_ids}
-            turnNo={game.turn_number}
+            players={players}
             currentPlayerId={game.current_player_id}
             setPlayerID={setPlayerID}
           />
@@ -101,10 +154,18 @@ function Game({ defaultPlayerID, gameID }) {
         <div id="you-section">
           <h2>{playerID}</h2>
           <div id="you-section-pass">
+            <button
+              disabled={!isMyTurn() || selected.length === 0}
+              onClick={() => {
+                playTurn("PLAY", selected);
+              }}
+            >
+              PLAY
+            </button>
             <button
               disabled={!isMyTurn()}
               onClick={() => {
-                playTurn("PASS", { value: 0, playable: true });
+                playTurn("PASS", []);
               }}
             >
               PASS
@@ -112,20 +173,21 @@ function Game({ defaultPlayerID, gameID }) {
           </div>
           <div id="card-list-box">
             <div id="card-list">
-              {youPlayer.hand
+              {(youPlayer.hand || [])
                 .sort((a, b) => a.rank - b.rank)
                 .map((card) => (
                   <div
                     key={card.value}
                     onClick={() => {
-                      playTurn("PLAY", card);
+                      toggleSelected(card);
                     }}
                   >
                     <Card
                       rank={card.rank}
                       suit={card.suit}
                       displayType={
-                        canPlay(card) ? "player-card-playable" : "player-card"
+                        (canPlay(card) ? "player-card-playable" : "player-card") +
+                        (isSelected(card) ? " player-card-selected" : "")
                       }
                     />
                   </div>
@@ -172,27 +234,7 @@ function Waiting({ gameID, playerIds, playerID }) {
   );
 }
 
-function Players({ gameID, playerIds, turnNo, currentPlayerId, setPlayerID }) {
-  const [players, setPlayers] = useState([]);
-
-  // TODO: Find a good fix for this. Because `useEffect` checks referential equality on
-  // `game.player_ids`, the players are fetched again even if the array elements
-  // don't change.
-  // eslint-disable-next-line
-  useEffect(refreshPlayers, [JSON.stringify(playerIds), turnNo]);
-
-  function refreshPlayers() {
-    const players = playerIds.map((id) => {
-      return fetch(`${BASE_URL}/games/${gameID}/players/${id}`).then(
-        handleBadRequest
-      );
-    });
-
-    Promise.all(players)
-      .then((playersData) => setPlayers(playersData))
-      .catch((response) => console.log(response));
-  }
-
+function Players({ players, currentPlayerId, setPlayerID }) {
   function playerStatus(player) {
     if (player.user_id === currentPlayerId) {
       return "TO PLAY";
@@ -217,7 +259,7 @@ function Players({ gameID, playerIds, turnNo, currentPlayerId, setPlayerID }) {
             >
               <div className="player-details-id">{player.user_id}</div>
               <div className="player-details-num-cards">
-                {`${String.fromCodePoint(0x1f0a0)} ${player.hand.length}`}
+                {`${String.fromCodePoint(0x1f0a0)} ${player.hand_size}`}
               </div>
               <div className="player-details-status">
                 {playerStatus(player)}
@@ -229,6 +271,10 @@ function Players({ gameID, playerIds, turnNo, currentPlayerId, setPlayerID }) {
   );
 }
 
+function sleep(ms) {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
 function handleBadRequest(response) {
   if (response.ok) {
     return response.json();
@@ -1,206 +1,108 @@
-from random import shuffle
-from typing import Set, Dict, Any, Optional
-from enum import Enum
+from typing import Dict, Any, Optional
 
-from serialize import serialize_iterable
 from game.card import Card
-
-class PlayerStatus(str, Enum):
-    ACTIVE   = "ACTIVE"
-    PASSED   = "PASSED"
-    FINISHED = "FINISHED"
-
-class Move(Enum):
-    PLAY = 0
-    PASS = 1
-
-class TurnResult(Enum):
-    SUCCESS           = 0
-    WRONG_PLAYER      = 1
-    PLAYER_PASSED     = 2
-    PLAYER_FINISHED   = 3
-    CARD_NOT_IN_HAND  = 4
-    CARD_NOT_PLAYABLE = 5
-
-class TurnEvent(Enum):
-    PLAYER_PASSED   = 0
-    PLAYER_FINISHED = 1
-    ROUND_FINISHED  = 2
-    GAME_FINISHED   = 3
+from game.rules import GameState, PlayerStatus, Move, TurnResult, TurnEvent
+from game import rules
+import hand as Hand
+from card import SERIALIZED, SERIALIZED_PLAYABLE
 
 class Player:
-    def __init__(self, player_id: str, hand: set[Card]):
+    """
+    One seat of a `Game`. Its hand and status are read from the game's state.
+    """
+    def __init__(self, game: "Game", player_no: int, player_id: str):
+        self.game = game
+        self.player_no = player_no
         self.id = player_id
-        self.hand = hand
-        self.status = PlayerStatus.ACTIVE
+
+    @property
+    def hand_mask(self) -> int:
+        # See `hand.py`
+        return self.game.state.hands[self.player_no]
+
+    @property
+    def status(self) -> PlayerStatus:
+        return self.game.state.statuses[self.player_no]
+
+    @property
+    def hand(self) -> list[Card]:
+        """
+        Sorted by rank
+        """
+        return [Card(c) for c in Hand.cards(self.hand_mask)]
 
     def serialize(self) -> Dict[str, Any]:
         return {
             "id": self.id,
-            "hand": serialize_iterable(sorted(self.hand, key=lambda c: c.rank)),
+            "hand": [SERIALIZED[c] for c in Hand.cards(self.hand_mask)],
             "status": self.status.name,
         }
 
-    def serialize_with_playable_cards(self, top_card: Optional[Card]) -> Dict[str, Any]:
+    def serialize_with_playable_cards(self, top_card: Optional[Card], top_count: int = 1) -> Dict[str, Any]:
         serialized_player = self.serialize()
-        serialized_hand = serialize_iterable(sorted(self.hand, key=lambda c: c.rank))
-        for serialized_card in serialized_player["hand"]:
-            serialized_card["playable"] = (top_card is None) or Card(serialized_card["value"]).is_playable(top_card)
+        playable = Hand.playable(self.hand_mask, top_card.value if top_card else None, top_count)
+        serialized_player["hand"] = [
+            SERIALIZED_PLAYABLE[c][Hand.contains(playable, c)]
+            for c in Hand.cards(self.hand_mask)
+        ]
         return serialized_player
 
 class Game:
-    def __init__(self, player_ids: list[str]):
-        hands = deal_hands(len(player_ids))
-        self.players = list(Player(player_id, hand) for (player_id, hand) in zip(player_ids, hands))
-        self.current_player_no = self.starting_player_no()
-        self.card_stack: list[Card] = []
-        self.last_card_played_player_no = -1
-        self.turn_no = 0
-
-    def starting_player_no(self) -> int:
-        """
-        Player with 3 OF DIAMONDS starts
-        """
-        return next(i for i, p in enumerate(self.players) if Card(0) in p.hand)
+    """
+    A game held in memory, played with the rules in `game.rules`.
+    """
+    def __init__(self, player_ids: list[str], state: Optional[GameState] = None):
+        self.state = state if state is not None else rules.new_game(len(player_ids))
+        self.players = list(Player(self, i, player_id) for i, player_id in enumerate(player_ids))
+
+    @property
+    def current_player_no(self) -> int:
+        return self.state.current_player_no
+
+    @property
+    def last_card_played_player_no(self) -> int:
+        return self.state.last_card_player_no
+
+    @property
+    def turn_no(self) -> int:
+        return self.state.turn_no
 
     def turn_details(self) -> Dict[str, Any]:
         player = self.players[self.current_player_no]
+        top_card = self.get_top_card()
         return {
             "player_no": self.current_player_no,
             "player_id": player.id,
-            "hand": serialize_iterable(sorted(player.hand, key=lambda c: c.rank)),
-            "top_card": self.card_stack[-1].serialize() if self.card_stack else None,
-            "playable_cards": serialize_iterable(sorted(playable_cards(self.card_stack, player.hand), key=lambda c: c.rank)),
+            "hand": [SERIALIZED[c] for c in Hand.cards(player.hand_mask)],
+            "top_card": top_card.serialize() if top_card else None,
+            "top_count": self.state.top_count if top_card else None,
+            "playable_cards": [
+                SERIALIZED[c] for c in Hand.cards(self.state.playable(self.current_player_no))
+            ],
             "game_finished": self.is_game_finished(),
         }
 
     def serialize(self) -> Dict[str, Any]:
         player = self.players[self.current_player_no]
+        top_card = self.get_top_card()
         return {
             "current_player_no": self.current_player_no,
             "current_player_id": player.id,
             "player_ids": list(p.id for p in self.players),
-            "top_card": self.card_stack[-1].serialize() if self.card_stack else None,
+            "top_card": top_card.serialize() if top_card else None,
+            "top_count": self.state.top_count if top_card else None,
             "game_status": "finished" if self.is_game_finished() else "playing",
             "turn_no": self.turn_no,
         }
 
     def get_top_card(self) -> Optional[Card]:
-        return self.card_stack[-1] if self.card_stack else None
+        return Card(self.state.top_card) if self.state.top_card is not None else None
 
     def is_game_finished(self) -> bool:
-        return all(p.status == PlayerStatus.FINISHED for p in self.players)
-
-    def play_turn(self, player_no: int, move: Move, card: Card) -> tuple[TurnResult, list[TurnEvent]]:
-        events: list[TurnEvent] = []
-        if player_no != self.current_player_no:
-            return TurnResult.WRONG_PLAYER, events
-
-        player = self.players[player_no]
-
-        if player.status == PlayerStatus.PASSED:
-            return TurnResult.PLAYER_PASSED, events
-
-        if player.status == PlayerStatus.FINISHED:
-            return TurnResult.PLAYER_FINISHED, events
-
-        if move == Move.PASS:
-            player.status = PlayerStatus.PASSED
-            events.append(TurnEvent.PLAYER_PASSED)
-            next_turn_events = self.prepare_next_turn()
-            events.extend(next_turn_events)
-            return TurnResult.SUCCESS, events
-
-        # Player has chosen to play a card
-        if card not in player.hand:
-            return TurnResult.CARD_NOT_IN_HAND, events
-
-        if card not in playable_cards(self.card_stack, player.hand):
-            return TurnResult.CARD_NOT_PLAYABLE, events
-
-        player.hand.remove(card)
-        self.card_stack.append(card)
-        self.last_card_played_player_no = self.current_player_no
-
-        if len(player.hand) == 0:
-            player.status = PlayerStatus.FINISHED
-            events.append(TurnEvent.PLAYER_FINISHED)
-
-        next_turn_events = self.prepare_next_turn()
-        events.extend(next_turn_events)
-        return TurnResult.SUCCESS, events
-
-    def prepare_next_turn(self) -> list[TurnEvent]:
-        next_player_no, events = self.find_next_player_no()
-        if next_player_no == -1:
-            # Game has finished
-            return events
-        elif TurnEvent.ROUND_FINISHED in events:
-            self.reset_round()
-        self.current_player_no = next_player_no
-        self.turn_no += 1
-        return events
-
-    def find_next_player_no(self) -> tuple[int, list[TurnEvent]]:
+        return self.state.is_finished()
+
+    def play_turn(self, player_no: int, move: Move, *cards: Card) -> tuple[TurnResult, list[TurnEvent]]:
         """
-        Assumes that `self.current_player_no` has just finished their turn.
+        Plays `cards`, which must all be of one rank. Passing takes any card.
         """
-        # Iterate through players, starting with the person right after the current player
-        for player_no in range_wrapped(len(self.players), offset=self.current_player_no + 1):
-            player = self.players[player_no]
-            if player_no == self.last_card_played_player_no:
-                # Passes all round, back to the last card player
-                events = [TurnEvent.ROUND_FINISHED]
-                if player.status == PlayerStatus.FINISHED:
-                    next_player_no = self.find_first_non_finished_player_no(start_no=player_no + 1)
-                    if next_player_no is None:
-                        events.append(TurnEvent.GAME_FINISHED)
-                        return -1, events
-                    else:
-                        return next_player_no, events
-                else:
-                    return player_no, events
-            elif player.status == PlayerStatus.ACTIVE:
-                return player_no, []
-        assert False
-
-    def find_first_non_finished_player_no(self, start_no) -> Optional[int]:
-        try:
-            return next(
-                p_no
-                for p_no in range_wrapped(len(self.players), offset=start_no)
-                if self.players[p_no].status != PlayerStatus.FINISHED
-            )
-        except StopIteration:
-            return None
-
-    def reset_round(self):
-        self.card_stack = []
-        for player in self.players:
-            if player.status == PlayerStatus.PASSED:
-                player.status = PlayerStatus.ACTIVE
-
-
-def range_wrapped(n, offset):
-    """
-    >>> list(range_wrapped(5, offset=2))
-    [2, 3, 4, 0, 1]
-    """
-    for i in range(0, n):
-        yield (i + offset) % n
-
-def playable_cards(card_stack: list[Card], hand: Set[Card]) -> Set[Card]:
-    if card_stack:
-        return set(card for card in hand if card.rank >= card_stack[-1].rank)
-    else:
-        return set(card for card in hand)
-
-def deal_hands(n: int) -> list[Set[Card]]:
-    deck = [Card(i) for i in range(52)]
-    shuffle(deck)
-    hands: list[Set[Card]] = [set() for _ in range(n)]
-    counter = 0
-    while deck:
-      hands[counter].add(deck.pop())
-      counter = (counter + 1) % n
-    return hands
+        return rules.play_turn(self.state, player_no, move, Hand.from_cards(c.value for c in cards))
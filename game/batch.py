@@ -0,0 +1,208 @@
+"""
+Plays many games at once: the state of K games is held in NumPy arrays, and
+`BatchGame.step` plays one turn in every game. Only single cards are played, and
+then the rules are the same as `Game.play_turn`, which tests/test_batch.py checks
+by playing seeded games in both engines, as does:
+
+    python -m game.batch --games 1000
+
+Requires numpy, which the web app doesn't need.
+"""
+from typing import Optional
+import argparse
+import random
+
+import numpy as np # type: ignore
+
+from game import Game, Move, TurnResult, TurnEvent, PlayerStatus
+from game.card import Card
+import hand as Hand
+
+ACTIVE, PASSED, FINISHED = 0, 1, 2
+STATUS_CODES = {PlayerStatus.ACTIVE: ACTIVE, PlayerStatus.PASSED: PASSED, PlayerStatus.FINISHED: FINISHED}
+
+# Move to pass with, in the array given to `BatchGame.step`
+PASS = -1
+
+CARD_BITS = np.array(Hand.CARD_BITS, dtype=np.uint64)
+CARD_RANKS = np.array([c % 13 for c in range(52)], dtype=np.int64)
+# Indexed by the top card's rank, or -1 when there is no top card
+RANK_AT_LEAST = np.array(Hand.RANK_AT_LEAST + (Hand.FULL,), dtype=np.uint64)
+
+def event_flag(event: TurnEvent) -> int:
+    return 1 << event.value
+
+class BatchGame:
+    def __init__(self, hands, statuses, current, top_card, last_player, turn_no):
+        self.hands = hands              # (K, P) uint64, see `hand.py`
+        self.statuses = statuses        # (K, P) int8
+        self.current = current          # (K,) int64
+        self.top_card = top_card        # (K,) int64, -1 if there is none
+        self.last_player = last_player  # (K,) int64
+        self.turn_no = turn_no          # (K,) int64
+        self.finished = np.zeros(len(current), dtype=bool)
+        self.rows = np.arange(len(current))
+
+    @classmethod
+    def from_games(cls, games: list[Game]) -> "BatchGame":
+        """
+        All games must have the same number of players.
+        """
+        top_cards = list(game.get_top_card() for game in games)
+        batch = cls(
+            hands=np.array([[p.hand_mask for p in g.players] for g in games], dtype=np.uint64),
+            statuses=np.array([[STATUS_CODES[p.status] for p in g.players] for g in games], dtype=np.int8),
+            current=np.array([g.current_player_no for g in games], dtype=np.int64),
+            top_card=np.array([c.value if c else -1 for c in top_cards], dtype=np.int64),
+            last_player=np.array([g.last_card_played_player_no for g in games], dtype=np.int64),
+            turn_no=np.array([g.turn_no for g in games], dtype=np.int64),
+        )
+        batch.finished = np.array([g.is_game_finished() for g in games], dtype=bool)
+        return batch
+
+    def num_players(self) -> int:
+        return self.hands.shape[1]
+
+    def top_rank(self):
+        return np.where(self.top_card >= 0, CARD_RANKS[self.top_card], -1)
+
+    def playable(self):
+        """
+        Mask of the cards the current player of each game can play.
+        """
+        return self.hands[self.rows, self.current] & RANK_AT_LEAST[self.top_rank()]
+
+    def step(self, moves):
+        """
+        Plays `moves[k]` (a card value, or `PASS`) for the current player of game
+        k. Returns each game's `TurnResult` value and its `TurnEvent`s as flags.
+        Games that have finished are left as they are.
+        """
+        rows, current = self.rows, self.current
+        playing = ~self.finished
+        results = np.full(len(rows), TurnResult.SUCCESS.value, dtype=np.int8)
+        events = np.zeros(len(rows), dtype=np.int64)
+
+        status = self.statuses[rows, current]
+        results[status == PASSED] = TurnResult.PLAYER_PASSED.value
+        results[status == FINISHED] = TurnResult.PLAYER_FINISHED.value
+        valid = playing & (results == TurnResult.SUCCESS.value)
+
+        passes = valid & (moves == PASS)
+        plays = valid & (moves != PASS)
+        cards = np.where(plays, moves, 0)
+        bits = CARD_BITS[cards]
+        hand = self.hands[rows, current]
+        in_hand = (hand & bits) != 0
+        results[plays & ~in_hand] = TurnResult.CARD_NOT_IN_HAND.value
+        playable = CARD_RANKS[cards] >= self.top_rank()
+        results[plays & in_hand & ~playable] = TurnResult.CARD_NOT_PLAYABLE.value
+        plays &= in_hand & playable
+
+        self.statuses[passes, current[passes]] = PASSED
+        events[passes] |= event_flag(TurnEvent.PLAYER_PASSED)
+
+        self.hands[plays, current[plays]] = hand[plays] & ~bits[plays]
+        self.top_card[plays] = cards[plays]
+        self.last_player[plays] = current[plays]
+        emptied = plays & (self.hands[rows, current] == 0)
+        self.statuses[emptied, current[emptied]] = FINISHED
+        events[emptied] |= event_flag(TurnEvent.PLAYER_FINISHED)
+
+        events |= self.prepare_next_turn(passes | plays)
+        return results, events
+
+    def prepare_next_turn(self, moved):
+        """
+        Same as `Game.prepare_next_turn`, for the games in the `moved` mask.
+        """
+        rows, n = self.rows, self.num_players()
+        events = np.zeros(len(rows), dtype=np.int64)
+
+        # The first player after the current one who is either the last card
+        # player, or is still active
+        after = (self.current[:, None] + np.arange(1, n + 1)) % n
+        candidates = (after == self.last_player[:, None]) | (self.statuses[rows[:, None], after] == ACTIVE)
+        next_player = after[rows, candidates.argmax(axis=1)]
+
+        round_finished = moved & (next_player == self.last_player)
+        events[round_finished] |= event_flag(TurnEvent.ROUND_FINISHED)
+
+        # The last card player has finished, so the round goes to the first
+        # player after them who hasn't
+        skip = round_finished & (self.statuses[rows, next_player] == FINISHED)
+        after = (next_player[:, None] + np.arange(1, n + 1)) % n
+        not_finished = self.statuses[rows[:, None], after] != FINISHED
+        next_player = np.where(skip, after[rows, not_finished.argmax(axis=1)], next_player)
+        game_finished = skip & ~not_finished.any(axis=1)
+        events[game_finished] |= event_flag(TurnEvent.GAME_FINISHED)
+        self.finished |= game_finished
+
+        reset = round_finished & ~game_finished
+        self.top_card[reset] = -1
+        self.statuses[reset] = np.where(self.statuses[reset] == PASSED, ACTIVE, self.statuses[reset])
+
+        advance = moved & ~game_finished
+        self.current[advance] = next_player[advance]
+        self.turn_no[advance] += 1
+        return events
+
+def pick_moves(batch: BatchGame, rng: random.Random) -> np.ndarray:
+    """
+    A random playable card or a pass for every game, including some invalid
+    moves so that the error results are compared too.
+    """
+    moves = np.full(len(batch.rows), PASS, dtype=np.int64)
+    for k, playable in enumerate(batch.playable().tolist()):
+        roll = rng.random()
+        if roll < 0.05:
+            moves[k] = rng.randrange(52)
+        elif roll < 0.8 and playable:
+            moves[k] = rng.choice(list(Hand.cards(playable)))
+    return moves
+
+def compare_with_engine(num_games: int, num_players: int, seed: int) -> Optional[str]:
+    """
+    Plays the same seeded moves in `Game` and `BatchGame`, and describes the first
+    difference between them, if any.
+    """
+    random.seed(seed)
+    rng = random.Random(seed)
+    games = [Game(list(str(p) for p in range(num_players))) for _ in range(num_games)]
+    batch = BatchGame.from_games(games)
+    while not batch.finished.all():
+        moves = pick_moves(batch, rng)
+        playing = ~batch.finished
+        results, events = batch.step(moves)
+        for k, game in enumerate(games):
+            if not playing[k]:
+                continue
+            move = Move.PASS if moves[k] == PASS else Move.PLAY
+            result, expected_events = game.play_turn(game.current_player_no, move, Card(max(int(moves[k]), 0)))
+            if game.state.top_count != 1:
+                return f"Game {k}, turn {game.turn_no}: more than one card played, which the batch engine can't"
+            expected = (result.value, sum(event_flag(e) for e in expected_events))
+            if expected != (results[k], events[k]):
+                return f"Game {k}, turn {game.turn_no}: expected {expected}, got {(results[k], events[k])}"
+            if game.current_player_no != batch.current[k]:
+                return f"Game {k}, turn {game.turn_no}: current player differs"
+    expected_batch = BatchGame.from_games(games)
+    for name in ("hands", "statuses", "current", "top_card", "last_player", "turn_no", "finished"):
+        if not np.array_equal(getattr(expected_batch, name), getattr(batch, name)):
+            return f"Final {name} differs"
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    difference = compare_with_engine(args.games, args.players, args.seed)
+    if difference:
+        raise SystemExit(difference)
+    print(f"{args.games} games matched")
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,54 @@
 from typing import Union
 
-FACE_RANKS = ["3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A", "2"]
-FACE_SUITS = ["DIAMONDS", "CLUBS", "HEARTS", "SPADES"]
+from card import DESCRIPTIONS, SERIALIZED
 
 class Card:
-    def __init__(self, value: int):
+    """
+    There is a single, immutable instance of each of the 52 cards: `Card(value)`
+    returns the existing instance instead of building a new one.
+    """
+    __slots__ = ("value", "rank", "suit")
+
+    value: int
+    rank: int
+    suit: int
+
+    def __new__(cls, value: int) -> "Card":
         if not 0 <= value < 52:
             raise ValueError(f"Cannot build Card from value: {value}")
-        self.value = value
-        self.rank = self.value % 13
-        self.suit = self.value // 13
+        return CARDS[value]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is immutable")
+
+    def __reduce__(self):
+        # Unpickling goes through `Card(value)`, so it gets the existing instance
+        return (Card, (self.value,))
 
     def __repr__(self):
         return f"Card({self.value})"
 
     def __str__(self):
-        return f"{FACE_RANKS[self.rank]} OF {FACE_SUITS[self.suit]}"
+        return DESCRIPTIONS[self.value]
 
     def __eq__(self, other):
-        return self.value == other.value
+        return isinstance(other, Card) and self.value == other.value
 
     def __hash__(self):
         return self.value
 
     def serialize(self) -> dict[str, Union[str, int]]:
-        return {
-            "value": self.value,
-            "rank": self.rank,
-            "suit": self.suit,
-            "description": str(self),
-        }
+        # Copied, because callers add their own keys
+        return dict(SERIALIZED[self.value])
 
     def is_playable(self, top_card: "Card") -> bool:
         return self.rank >= top_card.rank
+
+def build_card(value: int) -> Card:
+    card = object.__new__(Card)
+    object.__setattr__(card, "value", value)
+    object.__setattr__(card, "rank", value % 13)
+    object.__setattr__(card, "suit", value // 13)
+    return card
+
+CARDS = tuple(build_card(value) for value in range(52))
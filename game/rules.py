@@ -0,0 +1,215 @@
+"""
+The rules of President, on a plain `GameState`. Every engine plays turns through
+`play_turn`: `game.Game` for the CLI and simulations, and the storage adapters in
+`storage.py` for the API.
+"""
+from typing import Iterator, Optional
+from enum import Enum
+from random import shuffle
+
+import hand as Hand
+
+# Seats in a game, so that every hand is dealt at least 6 cards
+MAX_PLAYERS = 8
+
+class PlayerStatus(str, Enum):
+    ACTIVE   = "ACTIVE"
+    PASSED   = "PASSED"
+    FINISHED = "FINISHED"
+
+class Move(Enum):
+    PLAY = 0
+    PASS = 1
+
+class TurnResult(Enum):
+    SUCCESS           = 0
+    WRONG_PLAYER      = 1
+    PLAYER_PASSED     = 2
+    PLAYER_FINISHED   = 3
+    CARD_NOT_IN_HAND  = 4
+    CARD_NOT_PLAYABLE = 5
+
+class TurnEvent(Enum):
+    PLAYER_PASSED   = 0
+    PLAYER_FINISHED = 1
+    ROUND_FINISHED  = 2
+    GAME_FINISHED   = 3
+
+class GameState:
+    """
+    Everything the rules need to know about a game that has started. Players are
+    identified by their seat number.
+    """
+    __slots__ = ("hands", "statuses", "current_player_no", "top_card", "last_card_player_no", "turn_no", "top_count")
+
+    def __init__(self,
+                 hands: list[int],
+                 statuses: list[PlayerStatus],
+                 current_player_no: int,
+                 top_card: Optional[int],
+                 last_card_player_no: int,
+                 turn_no: int,
+                 top_count: int = 1):
+        # See `hand.py`
+        self.hands = hands
+        self.statuses = statuses
+        self.current_player_no = current_player_no
+        # The highest card of the last play of the round
+        self.top_card = top_card
+        self.last_card_player_no = last_card_player_no
+        self.turn_no = turn_no
+        # How many cards the last play had, which the next one must match
+        self.top_count = top_count
+
+    def copy(self) -> "GameState":
+        return GameState(
+            list(self.hands),
+            list(self.statuses),
+            self.current_player_no,
+            self.top_card,
+            self.last_card_player_no,
+            self.turn_no,
+            self.top_count,
+        )
+
+    def num_players(self) -> int:
+        return len(self.hands)
+
+    def is_finished(self) -> bool:
+        return all(s == PlayerStatus.FINISHED for s in self.statuses)
+
+    def playable(self, player_no: int) -> int:
+        return Hand.playable(self.hands[player_no], self.top_card, self.top_count)
+
+    def plays(self, player_no: int) -> Iterator[int]:
+        """
+        The player's legal plays, see `Hand.plays`.
+        """
+        return Hand.plays(self.hands[player_no], self.top_card, self.top_count)
+
+def new_game(num_players: int) -> GameState:
+    hands = deal_hands(num_players)
+    # Player with 3 of diamonds starts
+    starting_player_no = next(i for i, hand in enumerate(hands) if Hand.contains(hand, 0))
+    return GameState(
+        hands=hands,
+        statuses=[PlayerStatus.ACTIVE] * num_players,
+        current_player_no=starting_player_no,
+        top_card=None,
+        # As if the starting player had just played, so that if everyone passes
+        # before a card is played, the round goes back to them
+        last_card_player_no=starting_player_no,
+        turn_no=0,
+    )
+
+def play_turn(state: GameState, player_no: int, move: Move, cards: int) -> tuple[TurnResult, list[TurnEvent]]:
+    """
+    `cards` is the hand of 1 to 4 cards of one rank to play, see `hand.py`, and is
+    ignored when passing.
+    """
+    events: list[TurnEvent] = []
+    if player_no != state.current_player_no:
+        return TurnResult.WRONG_PLAYER, events
+
+    status = state.statuses[player_no]
+    if status == PlayerStatus.PASSED:
+        return TurnResult.PLAYER_PASSED, events
+    if status == PlayerStatus.FINISHED:
+        return TurnResult.PLAYER_FINISHED, events
+
+    if move == Move.PASS:
+        state.statuses[player_no] = PlayerStatus.PASSED
+        events.append(TurnEvent.PLAYER_PASSED)
+        events.extend(prepare_next_turn(state))
+        return TurnResult.SUCCESS, events
+
+    # Player has chosen to play cards
+    hand = state.hands[player_no]
+    if not cards or cards & ~hand:
+        return TurnResult.CARD_NOT_IN_HAND, events
+    if not Hand.is_legal_play(cards, state.top_card, state.top_count):
+        return TurnResult.CARD_NOT_PLAYABLE, events
+
+    hand &= ~cards
+    state.hands[player_no] = hand
+    # Cards are ordered by rank first, so the highest bit is the highest card
+    state.top_card = Hand.BIT_CARDS[cards.bit_length() - 1]
+    state.top_count = Hand.size(cards)
+    state.last_card_player_no = player_no
+
+    if hand == Hand.EMPTY:
+        state.statuses[player_no] = PlayerStatus.FINISHED
+        events.append(TurnEvent.PLAYER_FINISHED)
+
+    events.extend(prepare_next_turn(state))
+    return TurnResult.SUCCESS, events
+
+def prepare_next_turn(state: GameState) -> list[TurnEvent]:
+    next_player_no, events = find_next_player_no(state)
+    if next_player_no == -1:
+        # Game has finished
+        return events
+    elif TurnEvent.ROUND_FINISHED in events:
+        reset_round(state)
+    state.current_player_no = next_player_no
+    state.turn_no += 1
+    return events
+
+def find_next_player_no(state: GameState) -> tuple[int, list[TurnEvent]]:
+    """
+    Assumes that `state.current_player_no` has just finished their turn.
+    """
+    # Iterate through players, starting with the person right after the current player
+    statuses = state.statuses
+    for player_no in range_wrapped(len(statuses), offset=state.current_player_no + 1):
+        if player_no == state.last_card_player_no:
+            # Passes all round, back to the last card player
+            events = [TurnEvent.ROUND_FINISHED]
+            if statuses[player_no] == PlayerStatus.FINISHED:
+                next_player_no = find_first_non_finished_player_no(state, start_no=player_no + 1)
+                if next_player_no is None:
+                    events.append(TurnEvent.GAME_FINISHED)
+                    return -1, events
+                else:
+                    return next_player_no, events
+            else:
+                return player_no, events
+        elif statuses[player_no] == PlayerStatus.ACTIVE:
+            return player_no, []
+    assert False
+
+def find_first_non_finished_player_no(state: GameState, start_no: int) -> Optional[int]:
+    try:
+        return next(
+            p_no
+            for p_no in range_wrapped(len(state.statuses), offset=start_no)
+            if state.statuses[p_no] != PlayerStatus.FINISHED
+        )
+    except StopIteration:
+        return None
+
+def reset_round(state: GameState):
+    state.top_card = None
+    state.top_count = 1
+    statuses = state.statuses
+    for player_no, status in enumerate(statuses):
+        if status == PlayerStatus.PASSED:
+            statuses[player_no] = PlayerStatus.ACTIVE
+
+def range_wrapped(n, offset):
+    """
+    >>> list(range_wrapped(5, offset=2))
+    [2, 3, 4, 0, 1]
+    """
+    for i in range(0, n):
+        yield (i + offset) % n
+
+def deal_hands(n: int) -> list[int]:
+    deck = [i for i in range(52)]
+    shuffle(deck)
+    hands: list[int] = [Hand.EMPTY for _ in range(n)]
+    counter = 0
+    while deck:
+      hands[counter] = Hand.add(hands[counter], deck.pop())
+      counter = (counter + 1) % n
+    return hands
@@ -0,0 +1,254 @@
+"""
+Picks a move for a player by searching ahead with `rules.play_turn`, for hints and
+for seats that are played by the server.
+
+The other players' hands are hidden, so the search is run on a few samples of how
+the unseen cards could be dealt between them, and the move that does best across
+the samples is picked. Once only one other player holds cards, their hand is
+known and a single search solves the rest of the game, if there is time to.
+
+Each sample is searched with iterative deepening, within the time budget, and
+every player is assumed to play for their own best finishing position. Positions
+that are reached in several ways are only searched once, thanks to a table keyed
+on `state_key`.
+"""
+from typing import Optional
+import os
+import random
+import threading
+import time
+
+from game.rules import GameState, PlayerStatus, Move, TurnResult
+from game import rules
+import card as Card
+import hand as Hand
+
+BUDGET_SECONDS = float(os.environ.get("SEARCH_BUDGET_MS", "50")) / 1000
+SAMPLES = 8
+MAX_DEPTH = 64
+
+# Searches are CPU bound, so only a few may run at once in each process. Others
+# get the quick move.
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", "2"))
+search_slots = threading.BoundedSemaphore(SEARCH_WORKERS)
+
+STATUS_CODES = {PlayerStatus.ACTIVE: 0, PlayerStatus.PASSED: 1, PlayerStatus.FINISHED: 2}
+
+class OutOfTime(Exception):
+    pass
+
+class Hint:
+    def __init__(self, move: Move, cards: int, searched: bool, depth: int = 0, samples: int = 0):
+        self.move = move
+        # See `hand.py`. Empty when passing.
+        self.cards = cards if move == Move.PLAY else Hand.EMPTY
+        # False if there was no time or no worker to search with
+        self.searched = searched
+        self.depth = depth
+        self.samples = samples
+
+    def serialize(self):
+        return {
+            "move": self.move.name,
+            "cards": [Card.serialize(c) for c in Hand.cards(self.cards)],
+            "searched": self.searched,
+            "depth": self.depth,
+            "samples": self.samples,
+        }
+
+def state_key(state: GameState) -> tuple:
+    """
+    Everything the rest of the game depends on, which is all of the state but the
+    turn number.
+    """
+    statuses = 0
+    for status in state.statuses:
+        statuses = (statuses << 2) | STATUS_CODES[status]
+    return (
+        tuple(state.hands),
+        statuses,
+        state.current_player_no,
+        -1 if state.top_card is None else state.top_card,
+        state.top_count,
+        state.last_card_player_no,
+    )
+
+def candidate_moves(state: GameState, player_no: int) -> list[tuple[Move, int]]:
+    """
+    Every legal play, of which `Hand.plays` only gives one per rank and size since
+    suits don't matter once the game has started, and passing. A player leading a
+    round always plays, because passing would give the lead straight back to them.
+    """
+    moves = [(Move.PLAY, play) for play in state.plays(player_no)]
+    if state.top_card is not None or not moves:
+        moves.append((Move.PASS, Hand.EMPTY))
+    return moves
+
+def quick_move(state: GameState, player_no: int) -> tuple[Move, int]:
+    """
+    As many cards of the lowest playable rank as can be played, or a pass.
+    """
+    lowest = None
+    for play in state.plays(player_no):
+        if lowest is not None and Hand.play_rank(play) != Hand.play_rank(lowest):
+            break
+        # Plays of a rank come smallest first
+        lowest = play
+    return (Move.PASS, Hand.EMPTY) if lowest is None else (Move.PLAY, lowest)
+
+class Search:
+    """
+    Values are a list with, for each player, how good their finishing position is
+    expected to be: 1 for first, 0 for last. Only the values of the players who
+    haven't finished in a state are meaningful for it.
+    """
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.table: dict[tuple, tuple[int, list[float]]] = {}
+        self.nodes = 0
+        # Whether the last iteration stopped anywhere before the end of the game
+        self.cut_off = False
+
+    def position_value(self, state: GameState, position: int) -> float:
+        return 1 - position / (state.num_players() - 1)
+
+    def estimate(self, state: GameState) -> list[float]:
+        """
+        Plays the rest of the game with every player playing their lowest cards,
+        which is quick and plays about as well as a shallow search.
+        """
+        state = state.copy()
+        finished = sum(1 for s in state.statuses if s == PlayerStatus.FINISHED)
+        values = [0.0] * state.num_players()
+        while finished < state.num_players() - 1:
+            player_no = state.current_player_no
+            rules.play_turn(state, player_no, *quick_move(state, player_no))
+            if state.statuses[player_no] == PlayerStatus.FINISHED:
+                values[player_no] = self.position_value(state, finished)
+                finished += 1
+        return values
+
+    def values(self, state: GameState, depth: int) -> list[float]:
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            raise OutOfTime()
+
+        unfinished = list(i for i, s in enumerate(state.statuses) if s != PlayerStatus.FINISHED)
+        if len(unfinished) <= 1:
+            # The last player is last, whatever they play
+            return [0.0] * state.num_players()
+        if depth == 0:
+            self.cut_off = True
+            return self.estimate(state)
+
+        key = state_key(state)
+        cached = self.table.get(key)
+        if cached and cached[0] >= depth:
+            return cached[1]
+
+        player_no = state.current_player_no
+        finished_before = state.num_players() - len(unfinished)
+        best: Optional[list[float]] = None
+        for move, cards in candidate_moves(state, player_no):
+            child = state.copy()
+            result, _ = rules.play_turn(child, player_no, move, cards)
+            assert result == TurnResult.SUCCESS
+            values = list(self.values(child, depth - 1))
+            if child.statuses[player_no] == PlayerStatus.FINISHED:
+                values[player_no] = self.position_value(state, finished_before)
+            if best is None or values[player_no] > best[player_no]:
+                best = values
+        assert best is not None
+        self.table[key] = (depth, best)
+        return best
+
+    def root_values(self, state: GameState, player_no: int) -> tuple[dict[tuple[Move, int], float], int]:
+        """
+        The value of each of the player's moves, from the deepest search that
+        finished in time, and its depth.
+        """
+        scores: dict[tuple[Move, int], float] = {}
+        completed_depth = 0
+        finished_before = sum(1 for s in state.statuses if s == PlayerStatus.FINISHED)
+        for depth in range(1, MAX_DEPTH + 1):
+            self.cut_off = False
+            depth_scores = {}
+            try:
+                for move, cards in candidate_moves(state, player_no):
+                    child = state.copy()
+                    rules.play_turn(child, player_no, move, cards)
+                    if child.statuses[player_no] == PlayerStatus.FINISHED:
+                        value = self.position_value(state, finished_before)
+                    else:
+                        value = self.values(child, depth - 1)[player_no]
+                    depth_scores[(move, cards)] = value
+            except OutOfTime:
+                break
+            scores, completed_depth = depth_scores, depth
+            if not self.cut_off:
+                # Searched to the end of the game
+                break
+        return scores, completed_depth
+
+def sample_hidden_hands(state: GameState, player_no: int, rng: random.Random) -> GameState:
+    """
+    A copy of `state` where the cards the player can't see are dealt at random
+    between the other players, who keep as many cards as they had.
+    """
+    sample = state.copy()
+    unseen: list[int] = []
+    for other, hand in enumerate(state.hands):
+        if other != player_no:
+            unseen.extend(Hand.cards(hand))
+    rng.shuffle(unseen)
+    for other, hand in enumerate(state.hands):
+        if other != player_no:
+            size = Hand.size(hand)
+            sample.hands[other] = Hand.from_cards(unseen[:size])
+            del unseen[:size]
+    return sample
+
+def is_perfect_information(state: GameState, player_no: int) -> bool:
+    return sum(1 for other, hand in enumerate(state.hands) if other != player_no and hand) <= 1
+
+def choose_move(state: GameState,
+                player_no: int,
+                budget: float = BUDGET_SECONDS,
+                rng: Optional[random.Random] = None) -> Hint:
+    """
+    Only uses what `player_no` can see of `state`, and their own hand.
+    """
+    if not search_slots.acquire(blocking=False):
+        return Hint(*quick_move(state, player_no), searched=False)
+    try:
+        return search_move(state, player_no, budget, rng or random.Random())
+    finally:
+        search_slots.release()
+
+def search_move(state: GameState, player_no: int, budget: float, rng: random.Random) -> Hint:
+    moves = candidate_moves(state, player_no)
+    if len(moves) == 1:
+        return Hint(*moves[0], searched=False)
+
+    start = time.perf_counter()
+    samples = 1 if is_perfect_information(state, player_no) else SAMPLES
+    totals = {move: 0.0 for move in moves}
+    searched_samples = 0
+    min_depth = MAX_DEPTH
+    table: dict[tuple, tuple[int, list[float]]] = {}
+    for i in range(samples):
+        search = Search(deadline=start + budget * (i + 1) / samples)
+        # Keys include every hand, so positions from other samples never match
+        search.table = table
+        scores, depth = search.root_values(sample_hidden_hands(state, player_no, rng), player_no)
+        if not depth:
+            continue
+        for candidate, value in scores.items():
+            totals[candidate] += value
+        searched_samples += 1
+        min_depth = min(min_depth, depth)
+
+    if not searched_samples:
+        return Hint(*quick_move(state, player_no), searched=False)
+    move, cards = max(moves, key=lambda m: totals[m])
+    return Hint(move, cards, searched=True, depth=min_depth, samples=searched_samples)
@@ -0,0 +1,131 @@
+"""
+A hand is an int with one bit set per card. Bits are ordered by rank and then
+suit (bit `rank * 4 + suit`), so iterating over the bits gives the cards sorted by
+rank, and the cards of at least a given rank are all the bits above a threshold.
+A full hand needs 52 bits, so it fits in a BIGINT column.
+
+The four bits of a rank are called its nibble. A play is a set of 1 to 4 cards of
+one rank, also held as a hand, and which suits they are never matters to the
+rules, so plays are generated and checked per rank with tables indexed by nibble.
+"""
+from typing import Iterable, Iterator, Optional
+
+import card as Card
+
+EMPTY = 0
+
+# Bit for each card value, and the card value for each bit
+CARD_BITS = tuple(1 << (Card.rank(c) * 4 + Card.suit(c)) for c in range(52))
+BIT_CARDS = tuple(sorted(range(52), key=lambda c: CARD_BITS[c]))
+
+FULL = sum(CARD_BITS)
+
+# All cards whose rank is at least `rank`
+RANK_AT_LEAST = tuple(FULL & ~((1 << (rank * 4)) - 1) for rank in range(13))
+
+# The four cards of each rank
+RANK_MASKS = tuple(0xF << (rank * 4) for rank in range(13))
+
+MAX_PLAY_SIZE = 4
+
+# Indexed by nibble: how many cards of the rank it holds
+NIBBLE_SIZES = tuple(bin(nibble).count("1") for nibble in range(16))
+
+# Indexed by nibble, then by play size: the lowest cards of the nibble making a
+# play of that size, or 0 if it doesn't have enough
+NIBBLE_PLAYS = tuple(
+    tuple(
+        sum(sorted(1 << bit for bit in range(4) if nibble & (1 << bit))[:play_size])
+        if NIBBLE_SIZES[nibble] >= play_size else 0
+        for play_size in range(MAX_PLAY_SIZE + 1)
+    )
+    for nibble in range(16)
+)
+
+def from_cards(cards: Iterable[int]) -> int:
+    hand = EMPTY
+    for card in cards:
+        hand |= CARD_BITS[card]
+    return hand
+
+def cards(hand: int) -> Iterator[int]:
+    """
+    >>> list(cards(from_cards([14, 0, 13, 1])))
+    [0, 13, 1, 14]
+    """
+    while hand:
+        lowest_bit = hand & -hand
+        yield BIT_CARDS[lowest_bit.bit_length() - 1]
+        hand ^= lowest_bit
+
+def contains(hand: int, card: int) -> bool:
+    return bool(hand & CARD_BITS[card])
+
+def add(hand: int, card: int) -> int:
+    return hand | CARD_BITS[card]
+
+def remove(hand: int, card: int) -> int:
+    return hand & ~CARD_BITS[card]
+
+def size(hand: int) -> int:
+    return bin(hand).count("1")
+
+def nibble(hand: int, rank: int) -> int:
+    return (hand >> (rank * 4)) & 0xF
+
+def play_rank(cards: int) -> Optional[int]:
+    """
+    The rank of a play, or None if it is empty or holds more than one rank.
+    """
+    if not cards:
+        return None
+    rank = ((cards & -cards).bit_length() - 1) >> 2
+    return rank if not cards & ~RANK_MASKS[rank] else None
+
+def playable(hand: int, top_card: Optional[int], top_count: int = 1) -> int:
+    """
+    The cards in `hand` that can be part of a play on `top_card`, which was played
+    in a set of `top_count`: cards of at least its rank, of which the hand holds at
+    least `top_count`.
+    """
+    if top_card is None:
+        return hand
+    cards = hand & RANK_AT_LEAST[Card.rank(top_card)]
+    if top_count == 1:
+        return cards
+    for rank in range(Card.rank(top_card), 13):
+        if NIBBLE_SIZES[(cards >> (rank * 4)) & 0xF] < top_count:
+            cards &= ~RANK_MASKS[rank]
+    return cards
+
+def is_legal_play(cards: int, top_card: Optional[int], top_count: int = 1) -> bool:
+    """
+    Whether `cards` can be played on `top_card`: 1 to 4 cards of one rank, as many
+    as `top_count` and of at least the top card's rank if there is one.
+    """
+    rank = play_rank(cards)
+    if rank is None:
+        return False
+    if top_card is None:
+        return True
+    return rank >= Card.rank(top_card) and NIBBLE_SIZES[nibble(cards, rank)] == top_count
+
+def plays(hand: int, top_card: Optional[int], top_count: int = 1) -> Iterator[int]:
+    """
+    Every legal play from `hand`, lowest rank first, with one play per rank and
+    size since the suits don't matter. Leading a round, any number of cards of a
+    rank can be played; otherwise exactly `top_count`.
+
+    >>> list(list(cards(play)) for play in plays(from_cards([0, 13, 1]), None))
+    [[0], [0, 13], [1]]
+    """
+    first_rank = 0 if top_card is None else Card.rank(top_card)
+    for rank in range(first_rank, 13):
+        nibble_cards = (hand >> (rank * 4)) & 0xF
+        if not nibble_cards:
+            continue
+        if top_card is None:
+            for play_size in range(1, NIBBLE_SIZES[nibble_cards] + 1):
+                yield NIBBLE_PLAYS[nibble_cards][play_size] << (rank * 4)
+        elif NIBBLE_SIZES[nibble_cards] >= top_count:
+            yield NIBBLE_PLAYS[nibble_cards][top_count] << (rank * 4)
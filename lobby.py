@@ -0,0 +1,81 @@
+"""
+Lists games by status, newest first, for players looking for a game to join.
+
+Pages are found with the `game_status_id_idx` index, starting after the last id
+of the previous page rather than at an offset, so every page is as quick to read
+however many games there are. The first page, which nearly every request is for,
+is cached for `FIRST_PAGE_TTL_SECONDS`.
+"""
+from typing import Any, Optional
+import os
+import threading
+import time
+
+from sqlalchemy import Select, select # type: ignore
+
+from models import db
+from profiling import span
+import models
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+FIRST_PAGE_TTL_SECONDS = float(os.environ.get("LOBBY_TTL_SECONDS", "1"))
+
+def page_query(status: str, before: Optional[int], limit: int) -> Select:
+    """
+    One more row than the page holds, to tell whether there is a next page.
+    """
+    query: Select = select(models.Game.id, models.Game.num_players, models.Game.updated_at).\
+        where(models.Game.status == status).\
+        order_by(models.Game.id.desc()).\
+        limit(limit + 1)
+    if before is not None:
+        query = query.where(models.Game.id < before)
+    return query
+
+def read_page(status: str, before: Optional[int], limit: int) -> dict[str, Any]:
+    """
+    Up to `limit` games with `status` and an id below `before`, and the cursor of
+    the next page, which is None on the last page.
+    """
+    with span("db"):
+        rows = db.session.execute(page_query(status, before, limit)).all()
+    games = [
+        {
+            "id": game_id,
+            "status": status,
+            "num_players": num_players,
+            "updated_at": updated_at.isoformat(),
+        }
+        for game_id, num_players, updated_at in rows[:limit]
+    ]
+    return {
+        "games": games,
+        "next": games[-1]["id"] if len(rows) > limit else None,
+    }
+
+class FirstPageCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.pages: dict[tuple[str, int], tuple[float, dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, status: str, limit: int) -> dict[str, Any]:
+        key = (status, limit)
+        now = time.monotonic()
+        with self.lock:
+            cached = self.pages.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+        # Concurrent misses may each read the page, which is no worse than no cache
+        page = read_page(status, None, limit)
+        with self.lock:
+            self.pages[key] = (now + self.ttl, page)
+        return page
+
+first_pages = FirstPageCache(FIRST_PAGE_TTL_SECONDS)
+
+def list_games(status: str, before: Optional[int], limit: int) -> dict[str, Any]:
+    if before is None:
+        return first_pages.get(status, limit)
+    return read_page(status, before, limit)
@@ -0,0 +1,161 @@
+"""
+Database metrics for `/metrics`: how long requests wait to check out a pooled
+connection, how many connections are in use, and the latency of the queries run
+by each route. Latencies are kept for the most recent `SAMPLES` queries, so the
+percentiles describe recent traffic.
+"""
+from typing import Any, Optional
+from collections import deque
+import threading
+import time
+
+from flask import Flask, has_request_context, request
+from sqlalchemy import event # type: ignore
+from sqlalchemy.pool import QueuePool # type: ignore
+
+SAMPLES = 1024
+
+# Route of the queries run outside of a request, by the background threads
+BACKGROUND = "(background)"
+
+# Route of the requests that match no route, so that requests for random paths
+# don't each add a label
+UNMATCHED = "<unmatched>"
+
+# Kept in the WSGI environ rather than `g`, because routes push their own app
+# context, which has a `g` of its own
+REQUEST_QUERIES = "president.queries"
+
+class RequestQueries:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+class Samples:
+    def __init__(self):
+        self.count = 0
+        self.recent: deque[float] = deque(maxlen=SAMPLES)
+
+    def add(self, value: float):
+        self.count += 1
+        self.recent.append(value)
+
+    def summary(self) -> dict[str, Any]:
+        ordered = sorted(self.recent)
+        return {
+            "count": self.count,
+            "p50_ms": percentile(ordered, 0.5),
+            "p99_ms": percentile(ordered, 0.99),
+        }
+
+def percentile(ordered: list[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 3)
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkout_wait = Samples()
+        self.queries: dict[str, Samples] = {}
+        self.requests: dict[str, int] = {}
+
+    def record_checkout(self, seconds: float):
+        with self.lock:
+            self.checkout_wait.add(seconds)
+
+    def record_query(self, route: str, seconds: float):
+        with self.lock:
+            samples = self.queries.get(route)
+            if samples is None:
+                samples = self.queries[route] = Samples()
+            samples.add(seconds)
+
+    def record_request(self, route: str):
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def summary(self, pool) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "pool": {
+                    "size": pool.size(),
+                    "in_use": pool.checkedout(),
+                    "overflow": pool.overflow(),
+                    "checkout_wait": self.checkout_wait.summary(),
+                },
+                "routes": {
+                    route: {
+                        "requests": self.requests.get(route, 0),
+                        "queries": self.queries.get(route, Samples()).summary(),
+                    }
+                    for route in sorted(self.queries.keys() | self.requests.keys())
+                },
+            }
+
+    def prometheus(self, pool) -> str:
+        with self.lock:
+            lines = [
+                "# TYPE president_db_pool_in_use gauge",
+                f"president_db_pool_in_use {pool.checkedout()}",
+                "# TYPE president_db_pool_size gauge",
+                f"president_db_pool_size {pool.size()}",
+                "# TYPE president_db_checkouts_total counter",
+                f"president_db_checkouts_total {self.checkout_wait.count}",
+                "# TYPE president_db_queries_total counter",
+            ]
+            for route, samples in sorted(self.queries.items()):
+                lines.append(f'president_db_queries_total{{route="{route}"}} {samples.count}')
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+class TimedQueuePool(QueuePool):
+    """
+    Records how long each checkout waited for a connection, including the time to
+    open a new one.
+    """
+    def connect(self):
+        start = time.perf_counter()
+        connection = super().connect()
+        metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+def current_route() -> str:
+    if not has_request_context():
+        return BACKGROUND
+    return request.url_rule.rule if request.url_rule else UNMATCHED
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start"]
+    metrics.record_query(current_route(), seconds)
+    queries = request.environ.get(REQUEST_QUERIES) if has_request_context() else None
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += seconds
+
+def install(app: Flask, engine):
+    """
+    Counts the queries run by `engine`, and adds each request's query count and
+    time to its response as `X-Query-Count` and `X-Query-Time`.
+    """
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    @app.before_request
+    def start_counting():
+        request.environ[REQUEST_QUERIES] = RequestQueries()
+
+    @app.after_request
+    def add_query_headers(response):
+        metrics.record_request(current_route())
+        queries = request.environ.get(REQUEST_QUERIES)
+        if queries is not None:
+            response.headers["X-Query-Count"] = str(queries.count)
+            response.headers["X-Query-Time"] = f"{queries.seconds * 1000:.3f}ms"
+        return response
@@ -0,0 +1,37 @@
+"""
+Runs migrations against the app's database, see `config.database_url`, with the
+models' metadata so that `alembic revision --autogenerate` can compare against
+them. The app itself isn't imported, so that none of its background threads
+start while the schema is being changed.
+"""
+from logging.config import fileConfig
+
+from alembic import context # type: ignore
+from sqlalchemy import create_engine # type: ignore
+
+from config import database_url
+from models import db
+
+# Logs the migrations being run, as configured in alembic.ini
+if context.config.config_file_name:
+    fileConfig(context.config.config_file_name)
+
+target_metadata = db.metadata
+url = database_url()
+
+def run_migrations_offline():
+    context.configure(url=url, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
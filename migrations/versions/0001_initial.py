@@ -0,0 +1,40 @@
+"""
+The tables as they were before migrations were kept. Databases created before
+then should be stamped with this revision (`alembic stamp 0001`), or with 0002 if
+they already have its columns, before upgrading.
+
+Revision ID: 0001
+Revises:
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+from sqlalchemy.dialects import postgresql # type: ignore
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "game",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("status", sa.Text, nullable=False),
+        sa.Column("turn_number", sa.Integer, nullable=False),
+        sa.Column("current_player_index", sa.Integer, nullable=True),
+        sa.Column("last_card", sa.Integer, nullable=True),
+        sa.Column("last_card_player_index", sa.Integer, nullable=True),
+    )
+    op.create_table(
+        "player",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Text, nullable=False),
+        sa.Column("game_id", sa.Integer, sa.ForeignKey("game.id"), nullable=False),
+        sa.Column("game_player_index", sa.Integer, nullable=False),
+        sa.Column("status", sa.Text, nullable=False),
+        sa.Column("hand", postgresql.ARRAY(sa.Integer), nullable=True),
+    )
+
+def downgrade():
+    op.drop_table("player")
+    op.drop_table("game")
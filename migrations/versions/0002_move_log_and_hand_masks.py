@@ -0,0 +1,57 @@
+"""
+Columns and tables added for hand masks, optimistic locking, idempotent moves
+and the move log.
+
+Revision ID: 0002
+Revises: 0001
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+from sqlalchemy.dialects import postgresql # type: ignore
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("player", sa.Column("hand_mask", sa.BigInteger, nullable=True))
+
+    op.add_column("game", sa.Column("num_players", sa.Integer, nullable=True))
+    op.execute("UPDATE game SET num_players = (SELECT count(*) FROM player WHERE player.game_id = game.id)")
+    op.alter_column("game", "num_players", nullable=False)
+    op.add_column("game", sa.Column("last_move_key", sa.Text, nullable=True))
+    op.add_column("game", sa.Column("row_version", sa.Integer, nullable=False, server_default="1"))
+    op.alter_column("game", "row_version", server_default=None)
+
+    op.create_table(
+        "move",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("game_id", sa.Integer, sa.ForeignKey("game.id"), nullable=False),
+        sa.Column("turn_number", sa.Integer, nullable=False),
+        sa.Column("player_index", sa.Integer, nullable=False),
+        sa.Column("move", sa.Text, nullable=False),
+        sa.Column("card", sa.Integer, nullable=True),
+        sa.UniqueConstraint("game_id", "turn_number"),
+    )
+    op.create_table(
+        "game_snapshot",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("game_id", sa.Integer, sa.ForeignKey("game.id"), nullable=False),
+        sa.Column("move_count", sa.Integer, nullable=False),
+        sa.Column("hands", postgresql.ARRAY(sa.BigInteger), nullable=False),
+        sa.Column("statuses", postgresql.ARRAY(sa.Text), nullable=False),
+        sa.Column("current_player_index", sa.Integer, nullable=False),
+        sa.Column("last_card", sa.Integer, nullable=True),
+        sa.Column("last_card_player_index", sa.Integer, nullable=False),
+        sa.Column("turn_number", sa.Integer, nullable=False),
+        sa.UniqueConstraint("game_id", "move_count"),
+    )
+
+def downgrade():
+    op.drop_table("game_snapshot")
+    op.drop_table("move")
+    op.drop_column("game", "row_version")
+    op.drop_column("game", "last_move_key")
+    op.drop_column("game", "num_players")
+    op.drop_column("player", "hand_mask")
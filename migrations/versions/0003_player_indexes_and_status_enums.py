@@ -0,0 +1,37 @@
+"""
+Unique indexes for looking up players by user and by seat within a game, and
+enum types for the status columns.
+
+Revision ID: 0003
+Revises: 0002
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+GAME_STATUS = sa.Enum("waiting", "playing", name="game_status")
+PLAYER_STATUS = sa.Enum("ACTIVE", "PASSED", "FINISHED", name="player_status")
+
+def upgrade():
+    op.create_unique_constraint("player_game_id_user_id_key", "player", ["game_id", "user_id"])
+    op.create_unique_constraint("player_game_id_game_player_index_key", "player", ["game_id", "game_player_index"])
+
+    bind = op.get_bind()
+    GAME_STATUS.create(bind)
+    PLAYER_STATUS.create(bind)
+    op.alter_column("game", "status", type_=GAME_STATUS, postgresql_using="status::game_status")
+    op.alter_column("player", "status", type_=PLAYER_STATUS, postgresql_using="status::player_status")
+
+def downgrade():
+    op.alter_column("player", "status", type_=sa.Text)
+    op.alter_column("game", "status", type_=sa.Text)
+    bind = op.get_bind()
+    PLAYER_STATUS.drop(bind)
+    GAME_STATUS.drop(bind)
+
+    op.drop_constraint("player_game_id_game_player_index_key", "player")
+    op.drop_constraint("player_game_id_user_id_key", "player")
@@ -0,0 +1,42 @@
+"""
+Marks games as finished, and adds the archive of finished and abandoned games.
+
+Revision ID: 0004
+Revises: 0003
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+from sqlalchemy.dialects import postgresql # type: ignore
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute("ALTER TYPE game_status ADD VALUE IF NOT EXISTS 'finished'")
+    op.add_column("game", sa.Column(
+        "updated_at",
+        sa.DateTime(timezone=True),
+        nullable=False,
+        server_default=sa.func.now(),
+    ))
+    op.create_table(
+        "archived_game",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("status", sa.Text, nullable=False),
+        sa.Column("turn_number", sa.Integer, nullable=False),
+        sa.Column("num_players", sa.Integer, nullable=False),
+        sa.Column("game", postgresql.JSONB, nullable=False),
+        sa.Column("players", postgresql.JSONB, nullable=False),
+        sa.Column("moves", postgresql.JSONB, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("game_status_updated_at_idx", "game", ["status", "updated_at"])
+
+def downgrade():
+    op.drop_index("game_status_updated_at_idx", "game")
+    op.drop_table("archived_game")
+    op.drop_column("game", "updated_at")
+    # Enum values can't be dropped, so 'finished' stays in game_status
@@ -0,0 +1,19 @@
+"""
+Adds the flag for seats played by the server.
+
+Revision ID: 0005
+Revises: 0004
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("player", sa.Column("autoplay", sa.Boolean, nullable=False, server_default=sa.false()))
+
+def downgrade():
+    op.drop_column("player", "autoplay")
@@ -0,0 +1,26 @@
+"""
+Adds the deadline of each game's current turn.
+
+Revision ID: 0006
+Revises: 0005
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("game", sa.Column("turn_deadline", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "game_turn_deadline_idx",
+        "game",
+        ["turn_deadline"],
+        postgresql_where=sa.text("turn_deadline IS NOT NULL"),
+    )
+
+def downgrade():
+    op.drop_index("game_turn_deadline_idx", "game")
+    op.drop_column("game", "turn_deadline")
@@ -0,0 +1,18 @@
+"""
+Indexes games by status and id, for paging through the lobby.
+
+Revision ID: 0007
+Revises: 0006
+"""
+from alembic import op # type: ignore
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("game_status_id_idx", "game", ["status", "id"])
+
+def downgrade():
+    op.drop_index("game_status_id_idx", "game")
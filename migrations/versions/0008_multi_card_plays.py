@@ -0,0 +1,25 @@
+"""
+Records how many cards the top card was played with, and every card of a move.
+
+Revision ID: 0008
+Revises: 0007
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Every play so far had a single card
+    op.add_column("game", sa.Column("last_card_count", sa.Integer, nullable=False, server_default="1"))
+    op.add_column("game_snapshot", sa.Column("last_card_count", sa.Integer, nullable=False, server_default="1"))
+    # Moves played before this keep their single card in `card`
+    op.add_column("move", sa.Column("cards", sa.BigInteger, nullable=True))
+
+def downgrade():
+    op.drop_column("move", "cards")
+    op.drop_column("game_snapshot", "last_card_count")
+    op.drop_column("game", "last_card_count")
@@ -0,0 +1,24 @@
+"""
+Indexes the seats with autoplay on, for recovering the games waiting on them.
+
+Revision ID: 0009
+Revises: 0008
+"""
+from alembic import op # type: ignore
+import sqlalchemy as sa # type: ignore
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        "player_autoplay_idx",
+        "player",
+        ["game_id"],
+        postgresql_where=sa.text("autoplay"),
+    )
+
+def downgrade():
+    op.drop_index("player_autoplay_idx", "player")
@@ -1,63 +1,176 @@
-from typing import Any
-from random import shuffle
+from typing import Any, Optional
+from datetime import datetime, timedelta, timezone
+import os
 
-from sqlalchemy import Column, Integer, Text, ForeignKey # type: ignore
-from sqlalchemy.orm import relationship # type: ignore
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, Text, ForeignKey, text # type: ignore
+from sqlalchemy.orm import relationship, joinedload # type: ignore
 
 from models.base import db
-from models.player import Player
+from models.player import Player, PlayerStatus
+from models.move import GameMove, GameSnapshot
+from models.archive import ArchivedGame
+from game.rules import GameState
+from game import rules
 import card as Card
 
+GAME_STATUSES = ("waiting", "playing", "finished")
+
+# How long a player has to play before they pass automatically, see `timeouts.py`.
+# 0 turns the timeout off.
+TURN_TIMEOUT = timedelta(seconds=int(os.environ.get("TURN_TIMEOUT_SECONDS", "60")))
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Game(db.Model): # type: ignore
+    __table_args__ = (
+        # For finding games to archive
+        Index("game_status_updated_at_idx", "status", "updated_at"),
+        # For listing games by status, see `lobby.py`
+        Index("game_status_id_idx", "status", "id"),
+        # For recovering the pending turn deadlines without scanning every game
+        Index(
+            "game_turn_deadline_idx",
+            "turn_deadline",
+            postgresql_where=text("turn_deadline IS NOT NULL"),
+        ),
+    )
+
     id = Column(Integer, primary_key=True)
-    status = Column(Text, nullable=False)
+    status: Column[str] = Column(Enum(*GAME_STATUSES, name="game_status"), nullable=False)
     turn_number = Column(Integer, nullable=False)
     current_player_index = Column(Integer, nullable=True)
     last_card = Column(Integer, nullable=True)
+    # How many cards `last_card` was played with
+    last_card_count = Column(Integer, nullable=False)
     last_card_player_index = Column(Integer, nullable=True)
-    players = relationship("Player", backref="game", lazy=True)
+    # Denormalized so that the player count can be read without querying `player`
+    num_players = Column(Integer, nullable=False)
+    # Key of the last move applied, so that a retried request isn't applied twice
+    last_move_key = Column(Text, nullable=True)
+    # Bumped on every update, which fails with StaleDataError if another request
+    # updated the game in the meantime
+    row_version = Column(Integer, nullable=False)
+    # Set in Python rather than by the database, so that it isn't reloaded after
+    # every update. Used to find finished and abandoned games to archive.
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+    # When the current player passes automatically. NULL when the game isn't
+    # being played or turns don't time out.
+    turn_deadline = Column(DateTime(timezone=True), nullable=True)
+    players = relationship("Player", backref="game", lazy=True, order_by=Player.game_player_index)
+
+    __mapper_args__ = {"version_id_col": row_version}
 
     def __init__(self):
         self.status = "waiting"
         self.turn_number = 0
+        self.num_players = 0
+        self.last_card_count = 1
+
+    @staticmethod
+    def load_with_players(game_id: int, for_update: bool = False) -> Optional["Game"]:
+        """
+        Loads the game and all of its players in a single query. With `for_update`,
+        the game row is locked until the end of the transaction.
+        """
+        query = Game.query.options(joinedload(Game.players)).filter_by(id=game_id)
+        if for_update:
+            query = query.with_for_update(of=Game)
+        return query.one_or_none()
+
+    @staticmethod
+    def with_players(player_ids: list[str]) -> "Game":
+        """
+        A new game with its seats already taken, in order.
+        """
+        game = Game()
+        for player_id in player_ids:
+            game.add_player(player_id)
+        return game
+
+    def find_player(self, user_id: str) -> Optional[Player]:
+        return next((p for p in self.players if p.user_id == user_id), None)
+
+    def add_player(self, user_id: str) -> Player:
+        player = Player(user_id=user_id,
+                        game_id=self.id,
+                        game_player_index=self.num_players)
+        self.players.append(player)
+        self.num_players += 1
+        return player
 
     def start(self):
-        player_count = self.player_count()
-        hands = deal_hands(player_count)
-        for player, hand in zip(self.players, hands):
-            if 0 in hand:
-                # Player with 3 of diamonds starts
-                self.current_player_index = player.game_player_index
-                self.last_card_player_index = player.game_player_index
-            player.hand = hand
+        self.apply_state(rules.new_game(self.player_count()))
         self.status = "playing"
 
+    def to_state(self) -> GameState:
+        """
+        The state the rules play on. Only for games that have started.
+        """
+        return GameState(
+            hands=list(p.hand_mask for p in self.players),
+            statuses=list(PlayerStatus(p.status) for p in self.players),
+            current_player_no=self.current_player_index,
+            top_card=self.last_card,
+            last_card_player_no=self.last_card_player_index,
+            turn_no=self.turn_number,
+            top_count=self.last_card_count,
+        )
+
+    def apply_state(self, state: GameState):
+        if state.turn_no != self.turn_number or self.turn_deadline is None:
+            # A new turn, or the first one
+            self.turn_deadline = utcnow() + TURN_TIMEOUT if TURN_TIMEOUT else None
+        self.turn_number = state.turn_no
+        self.current_player_index = state.current_player_no
+        self.last_card = state.top_card
+        self.last_card_count = state.top_count
+        self.last_card_player_index = state.last_card_player_no
+        for player, hand, status in zip(self.players, state.hands, state.statuses):
+            player.hand_mask = hand
+            player.status = status.value
+        if state.is_finished():
+            self.status = "finished"
+            self.turn_deadline = None
+
     def is_waiting(self) -> bool:
         return self.status == "waiting"
 
     def player_count(self) -> int:
-        return Player.query.filter_by(game_id=self.id).count()
+        return self.num_players
+
+    def state_key(self) -> str:
+        """
+        Changes whenever a client would see a different game: a turn is played,
+        the game starts or finishes, a player joins, or a seat's autoplay is
+        turned on or off. The row version covers changes that are only to the
+        players, since those update the game's row too, see `touch`.
+        """
+        return format_state_key(self.turn_number, self.status, self.player_count(), self.row_version)
+
+    def touch(self):
+        """
+        Updates the game's row, and so bumps its row version, when only its
+        players have changed.
+        """
+        self.updated_at = utcnow()
 
     def serialize(self) -> dict[str, Any]:
-        current_player = Player.query.\
-            filter_by(game_id=self.id, game_player_index=self.current_player_index).first()
+        current_player = next(
+            (p for p in self.players if p.game_player_index == self.current_player_index),
+            None,
+        )
         player_ids = list(p.user_id for p in self.players)
         return {
             "id": self.id,
             "turn_number": self.turn_number,
             "current_player_index": self.current_player_index,
             "current_player_id": current_player.user_id if current_player else None,
-            "last_card": Card.serialize(self.last_card) if self.last_card else None,
+            "last_card": Card.serialize(self.last_card) if self.last_card is not None else None,
+            "last_card_count": self.last_card_count if self.last_card is not None else None,
             "player_ids": player_ids,
             "status": self.status,
         }
 
-def deal_hands(n: int) -> list[list[int]]:
-    deck = [i for i in range(52)]
-    shuffle(deck)
-    hands: list[list[int]] = [[] for _ in range(n)]
-    counter = 0
-    while deck:
-      hands[counter].append(deck.pop())
-      counter = (counter + 1) % n
-    return hands
+def format_state_key(turn_number: int, status: str, num_players: int, row_version: int) -> str:
+    return f"{turn_number}-{status}-{num_players}-{row_version}"
@@ -0,0 +1,43 @@
+from typing import Any
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, Text # type: ignore
+from sqlalchemy.dialects.postgresql import JSONB # type: ignore
+
+from models.base import db
+
+class ArchivedGame(db.Model): # type: ignore
+    """
+    A finished or abandoned game, moved out of the live tables by `archive.py`.
+    One row holds everything that is kept of the game.
+    """
+    __tablename__ = "archived_game"
+
+    # Same as the game's id, so that it can still be found by it
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    # "finished", or "abandoned" for games that never started
+    status = Column(Text, nullable=False)
+    turn_number = Column(Integer, nullable=False)
+    num_players = Column(Integer, nullable=False)
+    # As returned by `Game.serialize` and `Player.serialize` when it was archived
+    game = Column(JSONB, nullable=False)
+    players = Column(JSONB, nullable=False)
+    # [player_index, cards], with null cards for a pass, in the order played. Card
+    # values are lists, except in games archived before plays had several cards.
+    moves = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __init__(self, game, status: str, moves: list[list[Any]], archived_at: datetime):
+        self.id = game.id
+        self.status = status
+        self.turn_number = game.turn_number
+        self.num_players = game.num_players
+        self.game = dict(game.serialize(), status=status)
+        self.players = list(p.serialize() for p in game.players)
+        self.moves = moves
+        self.updated_at = game.updated_at
+        self.archived_at = archived_at
+
+    def serialize(self) -> dict[str, Any]:
+        return self.game
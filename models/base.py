@@ -1,3 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy # type: ignore
 
-db = SQLAlchemy()
+# Objects are only used for the length of a request, so there is no need to
+# reload them from the database after every commit
+db = SQLAlchemy(session_options={"expire_on_commit": False})
@@ -0,0 +1,81 @@
+from typing import Optional
+
+from sqlalchemy import Column, BigInteger, Integer, Text, ForeignKey, UniqueConstraint # type: ignore
+from sqlalchemy.types import ARRAY # type: ignore
+
+from models.base import db
+from game.rules import GameState, PlayerStatus
+import hand as Hand
+
+class GameMove(db.Model): # type: ignore
+    """
+    Every move that has been played, in order. Never updated.
+    """
+    __tablename__ = "move"
+    # A second move for the same turn is a conflicting request
+    __table_args__ = (UniqueConstraint("game_id", "turn_number"),)
+
+    id = Column(Integer, primary_key=True)
+    game_id = Column(Integer, ForeignKey("game.id"), nullable=False)
+    # The game's turn number when the move was played. Every move but the last
+    # one of a game moves on to the next turn, so this is also the move's position.
+    turn_number = Column(Integer, nullable=False)
+    player_index = Column(Integer, nullable=False)
+    move = Column(Text, nullable=False)
+    # Only set on moves from before plays could have several cards
+    legacy_card = Column("card", Integer, nullable=True)
+    # The cards played, see `hand.py`. NULL for a pass.
+    cards = Column(BigInteger, nullable=True)
+
+    def __init__(self, game_id: int, turn_number: int, player_index: int, move: str, cards: Optional[int]):
+        self.game_id = game_id
+        self.turn_number = turn_number
+        self.player_index = player_index
+        self.move = move
+        self.cards = cards
+
+    def played_cards(self) -> int:
+        if self.cards is not None:
+            return self.cards
+        return Hand.CARD_BITS[self.legacy_card] if self.legacy_card is not None else Hand.EMPTY
+
+class GameSnapshot(db.Model): # type: ignore
+    """
+    The state of a game after its first `move_count` moves, so that it can be
+    rebuilt without replaying every move.
+    """
+    __tablename__ = "game_snapshot"
+    __table_args__ = (UniqueConstraint("game_id", "move_count"),)
+
+    id = Column(Integer, primary_key=True)
+    game_id = Column(Integer, ForeignKey("game.id"), nullable=False)
+    move_count = Column(Integer, nullable=False)
+    hands: Column[list[int]] = Column(ARRAY(BigInteger), nullable=False)
+    statuses: Column[list[str]] = Column(ARRAY(Text), nullable=False)
+    current_player_index = Column(Integer, nullable=False)
+    last_card = Column(Integer, nullable=True)
+    last_card_count = Column(Integer, nullable=False)
+    last_card_player_index = Column(Integer, nullable=False)
+    turn_number = Column(Integer, nullable=False)
+
+    def __init__(self, game_id: int, move_count: int, state: GameState):
+        self.game_id = game_id
+        self.move_count = move_count
+        self.hands = list(state.hands)
+        self.statuses = list(s.value for s in state.statuses)
+        self.current_player_index = state.current_player_no
+        self.last_card = state.top_card
+        self.last_card_count = state.top_count
+        self.last_card_player_index = state.last_card_player_no
+        self.turn_number = state.turn_no
+
+    def to_state(self) -> GameState:
+        return GameState(
+            hands=list(self.hands),
+            statuses=list(PlayerStatus(s) for s in self.statuses),
+            current_player_no=self.current_player_index,
+            top_card=self.last_card,
+            last_card_player_no=self.last_card_player_index,
+            turn_no=self.turn_number,
+            top_count=self.last_card_count,
+        )
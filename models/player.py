@@ -1,31 +1,52 @@
-from enum import Enum
 from typing import Any, Optional
 
-from sqlalchemy import Column, Integer, Text, ForeignKey # type: ignore
+from sqlalchemy import Column, BigInteger, Boolean, Enum, Index, Integer, Text, ForeignKey, UniqueConstraint, bindparam, select, text, update # type: ignore
+from sqlalchemy.orm import reconstructor # type: ignore
 from sqlalchemy.types import ARRAY # type: ignore
 
 from models.base import db
-from serialize import serialize_iterable
+from game.rules import PlayerStatus
 import card as Card
-
-class PlayerStatus(str, Enum):
-    ACTIVE   = "ACTIVE"
-    PASSED   = "PASSED"
-    FINISHED = "FINISHED"
+import hand as Hand
 
 class Player(db.Model): # type: ignore
+    # Players are looked up by user or by seat within a game. Both indexes start
+    # with `game_id`, so loading a game's players uses them too.
+    __table_args__ = (
+        UniqueConstraint("game_id", "user_id"),
+        UniqueConstraint("game_id", "game_player_index"),
+        # For recovering the games waiting on an autoplay seat, see `autoplay.py`
+        Index("player_autoplay_idx", "game_id", postgresql_where=text("autoplay")),
+    )
+
     id = Column(Integer, primary_key=True)
     user_id = Column(Text, nullable=False)
     game_id = Column(Integer, ForeignKey("game.id"), nullable=False)
     game_player_index = Column(Integer, nullable=False)
-    status = Column(Text, nullable=False)
-    hand = Column(ARRAY(Integer), nullable=True)
+    status: Column[str] = Column(Enum(*(s.value for s in PlayerStatus), name="player_status"), nullable=False)
+    # See `hand.py`. NULL until the game has started.
+    hand_mask = Column(BigInteger, nullable=True)
+    # Replaced by `hand_mask`. Kept until `migrate_hands` has run on every database.
+    legacy_hand: Column[list[int]] = Column("hand", ARRAY(Integer), nullable=True)
+    # Whether the server plays this seat's turns, see `autoplay.py`
+    autoplay = Column(Boolean, nullable=False, default=False)
 
     def __init__(self, user_id: str, game_id: int, game_player_index: int):
         self.user_id = user_id
         self.game_id = game_id
         self.game_player_index = game_player_index
         self.status = PlayerStatus.ACTIVE.name
+        self.autoplay = False
+
+    @reconstructor
+    def migrate_legacy_hand(self):
+        """
+        Players from before `hand_mask` existed are migrated as they are loaded.
+        Changes made while loading aren't saved, so `migrate_hands` saves them.
+        """
+        if self.hand_mask is None and self.legacy_hand is not None:
+            self.hand_mask = Hand.from_cards(self.legacy_hand)
+            self.legacy_hand = None
 
     def serialize(self) -> dict[str, Any]:
         return {
@@ -33,12 +54,58 @@ class Player(db.Model): # type: ignore
             "game_id": self.game_id,
             "game_player_index": self.game_player_index,
             "user_id": self.user_id,
-            "hand": [Card.serialize(c) for c in self.hand] if self.hand else self.hand,
+            # Shared with every other serialized hand, so must not be modified
+            "hand": [Card.SERIALIZED[c] for c in Hand.cards(self.hand_mask)] if self.hand_mask is not None else None,
+            "status": self.status,
+            "autoplay": self.autoplay,
+        }
+
+    def serialize_public(self) -> dict[str, Any]:
+        """
+        What every other player at the table is allowed to see.
+        """
+        return {
+            "id": self.id,
+            "game_id": self.game_id,
+            "game_player_index": self.game_player_index,
+            "user_id": self.user_id,
+            "hand_size": Hand.size(self.hand_mask or Hand.EMPTY),
             "status": self.status,
+            "autoplay": self.autoplay,
         }
 
-    def serialize_with_playable_cards(self, top_card: Optional[int]) -> dict[str, Any]:
+    def serialize_with_playable_cards(self, top_card: Optional[int], top_count: int = 1) -> dict[str, Any]:
         serialized = self.serialize()
-        for card in serialized["hand"]:
-            card["playable"] = (top_card is None) or Card.is_playable(card["value"], top_card)
+        if self.hand_mask is not None:
+            playable = Hand.playable(self.hand_mask, top_card, top_count)
+            serialized["hand"] = [
+                Card.SERIALIZED_PLAYABLE[c][Hand.contains(playable, c)]
+                for c in Hand.cards(self.hand_mask)
+            ]
         return serialized
+
+def migrate_hands(batch_size: int = 1000) -> int:
+    """
+    Fills in `hand_mask` for every player that only has the legacy `hand` array.
+    Returns the number of players migrated.
+    """
+    table = Player.__table__
+    migrate = update(table).\
+        where(table.c.id == bindparam("player_id")).\
+        values(hand_mask=bindparam("mask"), hand=None)
+    migrated = 0
+    while True:
+        # Read as rows rather than players, which would be migrated as they load
+        rows = db.session.execute(
+            select(table.c.id, table.c.hand).
+            where(table.c.hand_mask.is_(None), table.c.hand.isnot(None)).
+            limit(batch_size)
+        ).all()
+        if not rows:
+            return migrated
+        db.session.execute(migrate, [
+            {"player_id": player_id, "mask": Hand.from_cards(hand)}
+            for player_id, hand in rows
+        ])
+        db.session.commit()
+        migrated += len(rows)
@@ -0,0 +1,192 @@
+from typing import Callable, Optional
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+
+from config import libpq_url
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "game_updates"
+
+# Games whose version is kept. Past this, the half notified longest ago are
+# forgotten, see `LocalNotifier.version`.
+MAX_VERSIONS = 10000
+
+# Seconds to wait before connecting again after losing the Postgres connection,
+# doubled after each failure
+MIN_RECONNECT_SECONDS = 0.5
+MAX_RECONNECT_SECONDS = 30.0
+
+class LocalNotifier:
+    """
+    In-process notifier. Only wakes up watchers in the same process, so it is
+    only correct when the app runs as a single worker.
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        # The sequence number of each game's last notification, in that order
+        self.versions: dict[int, int] = {}
+        self.sequence = 0
+        # The latest sequence number forgotten
+        self.forgotten = 0
+        self.listeners: list[Callable[[int], None]] = []
+
+    def add_listener(self, listener: Callable[[int], None]):
+        """
+        Calls `listener` with the game id on every notification, from whichever
+        thread the notification arrives on.
+        """
+        self.listeners.append(listener)
+
+    def notify(self, game_id: int):
+        with self.condition:
+            self.sequence += 1
+            self.versions.pop(game_id, None)
+            self.versions[game_id] = self.sequence
+            if len(self.versions) > MAX_VERSIONS:
+                self.forget()
+            self.condition.notify_all()
+        for listener in self.listeners:
+            try:
+                listener(game_id)
+            except Exception:
+                # Notifications are sent once the change is committed, so failing
+                # the request would only hide that it succeeded
+                logger.exception("Notifying a listener of game %d failed", game_id)
+
+    def forget(self):
+        for game_id in list(itertools.islice(self.versions, len(self.versions) // 2)):
+            self.forgotten = self.versions.pop(game_id)
+
+    def version(self, game_id: int) -> int:
+        """
+        Games that haven't been notified, or were forgotten, have the latest
+        forgotten version. Forgetting games changes it, which wakes their watchers
+        early, but never misses a notification.
+        """
+        with self.condition:
+            return self.versions.get(game_id, self.forgotten)
+
+    def wait(self, game_id: int, since: int, timeout: float) -> bool:
+        """
+        Blocks until `game_id` has been notified after `since` (a value returned by
+        `version`), or until `timeout` seconds have passed. Returns whether the game
+        was notified.
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.versions.get(game_id, self.forgotten) != since,
+                timeout=timeout,
+            )
+
+class PostgresNotifier(LocalNotifier):
+    """
+    Sends notifications through Postgres LISTEN/NOTIFY, so that watchers in every
+    gunicorn worker are woken up. A background thread listens on `CHANNEL` and
+    forwards each notification to the local watchers.
+
+    Both connections are opened again when they fail. Notifications sent while the
+    database can't be reached only wake this process's watchers, and the others
+    see the change when their long-poll times out.
+    """
+    def __init__(self, url: str):
+        super().__init__()
+        self.dsn = libpq_url(url)
+        self.send_lock = threading.Lock()
+        self.send_conn = None
+        self.send_backoff = Backoff()
+        thread = threading.Thread(target=self.listen, daemon=True)
+        thread.start()
+
+    def notify(self, game_id: int):
+        payload = json.dumps({"game_id": game_id})
+        try:
+            with self.send_lock:
+                self.send(payload)
+        except Exception as error:
+            logger.warning("Failed to send the notification for game %d: %s", game_id, error)
+            super().notify(game_id)
+
+    def send(self, payload: str):
+        import psycopg2 # type: ignore
+        if self.send_conn is None or self.send_conn.closed:
+            if not self.send_backoff.ready():
+                raise ConnectionError("Waiting to connect to the database again")
+            try:
+                self.send_conn = psycopg2.connect(self.dsn)
+            except psycopg2.Error:
+                self.send_backoff.failed()
+                raise
+            self.send_conn.autocommit = True
+        try:
+            with self.send_conn.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, payload))
+        except psycopg2.Error:
+            self.send_conn.close()
+            self.send_backoff.failed()
+            raise
+        self.send_backoff.succeeded()
+
+    def listen(self):
+        backoff = Backoff()
+        while True:
+            try:
+                self.listen_until_disconnected(backoff)
+            except Exception:
+                logger.exception("Lost the connection listening for notifications")
+            backoff.failed()
+            time.sleep(backoff.seconds_until_ready())
+
+    def listen_until_disconnected(self, backoff: "Backoff"):
+        import psycopg2 # type: ignore
+        conn = psycopg2.connect(self.dsn)
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            backoff.succeeded()
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    try:
+                        game_id = json.loads(notification.payload)["game_id"]
+                    except (ValueError, KeyError):
+                        logger.warning(f"Ignoring malformed notification: {notification.payload}")
+                        continue
+                    super().notify(game_id)
+        finally:
+            conn.close()
+
+class Backoff:
+    """
+    When to try again after a connection fails.
+    """
+    def __init__(self):
+        self.delay = 0.0
+        self.retry_at = 0.0
+
+    def ready(self) -> bool:
+        return time.monotonic() >= self.retry_at
+
+    def seconds_until_ready(self) -> float:
+        return max(self.retry_at - time.monotonic(), 0)
+
+    def failed(self):
+        self.delay = min(max(self.delay * 2, MIN_RECONNECT_SECONDS), MAX_RECONNECT_SECONDS)
+        self.retry_at = time.monotonic() + self.delay
+
+    def succeeded(self):
+        self.delay = 0.0
+        self.retry_at = 0.0
+
+def build_notifier(backend: Optional[str], dsn: str) -> LocalNotifier:
+    if backend == "postgres":
+        return PostgresNotifier(dsn)
+    return LocalNotifier()
@@ -0,0 +1,137 @@
+"""
+Opt-in timing of the parts of each request, set with environment variables:
+
+    PROFILE_SPANS=1          time the spans of each route, exported by
+                             `GET /metrics/prometheus`
+    PROFILE_SAMPLE_RATE=0.01 also run this fraction of requests under cProfile,
+                             and dump their stats to PROFILE_DIR (./profiles)
+
+Spans are marked with `with span("db"):`. When spans are off, `span` returns a
+shared no-op context manager, so marking them costs next to nothing.
+"""
+from typing import ContextManager, Optional
+from bisect import bisect_left
+from contextlib import nullcontext
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+
+from flask import Flask, has_request_context, request
+
+from metrics import current_route
+
+ENABLED = os.environ.get("PROFILE_SPANS") == "1"
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0")) if ENABLED else 0.0
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Span covering the whole request
+TOTAL = "total"
+
+REQUEST_SPANS = "president.spans"
+REQUEST_PROFILE = "president.profile"
+
+NO_SPAN = nullcontext()
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        # One more than `BUCKETS`, for +Inf
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+class Spans:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+
+    def observe(self, route: str, spans: dict[str, float]):
+        with self.lock:
+            for name, seconds in spans.items():
+                histogram = self.histograms.get((route, name))
+                if histogram is None:
+                    histogram = self.histograms[(route, name)] = Histogram()
+                histogram.observe(seconds)
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP president_span_seconds Time spent in each part of a request",
+            "# TYPE president_span_seconds histogram",
+        ]
+        with self.lock:
+            for (route, name), histogram in sorted(self.histograms.items()):
+                labels = f'route="{route}",span="{name}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'president_span_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"president_span_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"president_span_seconds_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+spans = Spans()
+
+class Span:
+    __slots__ = ("totals", "name", "start")
+
+    def __init__(self, totals: dict[str, float], name: str):
+        self.totals = totals
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.totals[self.name] = self.totals.get(self.name, 0.0) + time.perf_counter() - self.start
+
+def span(name: str) -> ContextManager:
+    """
+    Adds the time spent in the block to the current request's `name` span.
+    """
+    if not ENABLED or not has_request_context():
+        return NO_SPAN
+    totals: Optional[dict[str, float]] = request.environ.get(REQUEST_SPANS)
+    if totals is None:
+        return NO_SPAN
+    return Span(totals, name)
+
+def profile_path(route: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+    return os.path.join(PROFILE_DIR, f"{name}-{time.time_ns()}.pstats")
+
+def install(app: Flask):
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def start_spans():
+        request.environ[REQUEST_SPANS] = {TOTAL: time.perf_counter()}
+        if SAMPLE_RATE and random.random() < SAMPLE_RATE:
+            profile = cProfile.Profile()
+            request.environ[REQUEST_PROFILE] = profile
+            profile.enable()
+
+    @app.after_request
+    def record_spans(response):
+        profile: Optional[cProfile.Profile] = request.environ.get(REQUEST_PROFILE)
+        if profile is not None:
+            profile.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profile.dump_stats(profile_path(current_route()))
+
+        totals = request.environ.get(REQUEST_SPANS)
+        if totals is not None:
+            totals[TOTAL] = time.perf_counter() - totals[TOTAL]
+            spans.observe(current_route(), totals)
+        return response
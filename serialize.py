@@ -1,11 +1,15 @@
-from typing import Union, Iterable, Any
+from typing import Any
+import json
 
-def serialize_iterable(items: Iterable) -> list[Any]:
-    serialized = []
-    for item in items:
-        serial_attr = getattr(item, "serialize", None)
-        if serial_attr and callable(serial_attr):
-            serialized.append(item.serialize())
-        else:
-            serialized.append(repr(item))
-    return serialized
+try:
+    import orjson # type: ignore
+except ImportError:
+    orjson = None # type: ignore
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encodes `obj` as JSON, with orjson if it is installed.
+    """
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
@@ -0,0 +1,156 @@
+"""
+Plays complete games with the rules in `game.rules` without any input, using bots, and
+reports how fast they were played, how long they were and which seats won.
+
+    python simulate.py --games 100000 --policies random,lowest,pass,lowest
+"""
+from typing import Callable, Optional
+from collections import Counter
+from multiprocessing import Pool
+import argparse
+import json
+import os
+import random
+import time
+
+from game.rules import Move, TurnEvent
+from game import rules
+import hand as Hand
+
+# Given the legal plays, lowest rank first, and the top card, picks the cards to
+# play, or None to pass
+Policy = Callable[[list[int], Optional[int], random.Random], Optional[int]]
+
+def random_policy(plays: list[int], top_card: Optional[int], rng: random.Random) -> Optional[int]:
+    options: list[Optional[int]] = list(plays)
+    options.append(None)
+    return rng.choice(options)
+
+def lowest_playable_policy(plays: list[int], top_card: Optional[int], rng: random.Random) -> Optional[int]:
+    """
+    The lowest rank, with as many of its cards as can be played.
+    """
+    if not plays:
+        return None
+    rank = Hand.play_rank(plays[0])
+    return max((play for play in plays if Hand.play_rank(play) == rank), key=Hand.size)
+
+def pass_when_possible_policy(plays: list[int], top_card: Optional[int], rng: random.Random) -> Optional[int]:
+    """
+    Only plays when leading a round.
+    """
+    if top_card is not None:
+        return None
+    return lowest_playable_policy(plays, top_card, rng)
+
+POLICIES: dict[str, Policy] = {
+    "random": random_policy,
+    "lowest": lowest_playable_policy,
+    "pass": pass_when_possible_policy,
+}
+
+# A game of 52 cards can't take more turns than this without a bug in the rules
+MAX_TURNS = 10000
+
+def play_game(policies: list[Policy], rng: random.Random) -> tuple[int, int]:
+    """
+    Returns the number of turns played and the seat that finished first.
+    """
+    state = rules.new_game(len(policies))
+    winner = -1
+    for turn in range(1, MAX_TURNS):
+        player_no = state.current_player_no
+        cards = policies[player_no](list(state.plays(player_no)), state.top_card, rng)
+
+        if cards is None:
+            result, events = rules.play_turn(state, player_no, Move.PASS, 0)
+        else:
+            result, events = rules.play_turn(state, player_no, Move.PLAY, cards)
+        if TurnEvent.PLAYER_FINISHED in events and winner == -1:
+            winner = player_no
+        if TurnEvent.GAME_FINISHED in events:
+            return turn, winner
+    raise RuntimeError(f"Game did not finish within {MAX_TURNS} turns")
+
+def play_games(args: tuple[list[str], int, int]) -> tuple[Counter, Counter]:
+    policy_names, num_games, seed = args
+    policies = list(POLICIES[name] for name in policy_names)
+    # `game.rules.deal_hands` shuffles with the global generator
+    random.seed(seed)
+    rng = random.Random(seed)
+    turns: Counter = Counter()
+    wins: Counter = Counter()
+    for _ in range(num_games):
+        num_turns, winner = play_game(policies, rng)
+        turns[num_turns] += 1
+        wins[winner] += 1
+    return turns, wins
+
+def percentile(counts: Counter, fraction: float) -> int:
+    target = fraction * sum(counts.values())
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= target:
+            return value
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--policies", default="random,random,random,random",
+                        help=f"One per seat, from: {', '.join(POLICIES)}")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    policy_names = args.policies.split(",")
+    unknown = set(policy_names) - set(POLICIES)
+    if unknown:
+        parser.error(f"Unknown policies: {', '.join(sorted(unknown))}")
+
+    chunks = []
+    remaining = args.games
+    while remaining > 0:
+        chunk_size = min(args.chunk_size, remaining)
+        chunks.append((policy_names, chunk_size, args.seed + len(chunks)))
+        remaining -= chunk_size
+
+    turns: Counter = Counter()
+    wins: Counter = Counter()
+    start = time.perf_counter()
+    with Pool(args.processes) as pool:
+        for chunk_turns, chunk_wins in pool.imap_unordered(play_games, chunks):
+            turns.update(chunk_turns)
+            wins.update(chunk_wins)
+    elapsed = time.perf_counter() - start
+
+    num_games = sum(turns.values())
+    total_turns = sum(t * n for t, n in turns.items())
+    print(json.dumps({
+        "games": num_games,
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(num_games / elapsed),
+        "turns_per_second": round(total_turns / elapsed),
+        "turns_per_game": {
+            "mean": round(total_turns / num_games, 1),
+            "min": min(turns),
+            "p50": percentile(turns, 0.5),
+            "p90": percentile(turns, 0.9),
+            "p99": percentile(turns, 0.99),
+            "max": max(turns),
+        },
+        "win_rate_by_seat": {
+            f"{seat}:{name}": round(wins[seat] / num_games, 4)
+            for seat, name in enumerate(policy_names)
+        },
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
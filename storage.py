@@ -0,0 +1,216 @@
+"""
+Where the API's games are kept between requests. A request opens a game, plays a
+turn with `StoredGame.play_turn`, and saves it, whichever storage is used.
+
+Every move is also appended to the `move` table, with a snapshot of the game's
+state every `SNAPSHOT_INTERVAL` moves, so that a game can be rebuilt with `replay`.
+"""
+from typing import Any, Callable, ContextManager, Iterator, Optional
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import threading
+
+from sqlalchemy.exc import IntegrityError # type: ignore
+from sqlalchemy.orm.exc import StaleDataError # type: ignore
+
+from game.rules import GameState, Move, TurnResult, TurnEvent
+from game import rules
+from models import db
+from profiling import span
+import models
+import card as Card
+
+SNAPSHOT_INTERVAL = 16
+
+class StoredGame:
+    def __init__(self,
+                 game_id: int,
+                 status: str,
+                 player_ids: list[str],
+                 state: Optional[GameState],
+                 last_move_key: Optional[str],
+                 autoplay: Optional[list[bool]] = None):
+        self.game_id = game_id
+        self.status = status
+        self.player_ids = player_ids
+        # None until the game has started
+        self.state = state
+        self.last_move_key = last_move_key
+        # For each seat, whether the server plays its turns
+        self.autoplay = autoplay or [False] * len(player_ids)
+        # The storage's own representation of the game, if it has one
+        self.row: Any = None
+        # Moves played since the game was opened
+        self.new_moves: list[models.GameMove] = []
+
+    def is_waiting(self) -> bool:
+        return self.status == "waiting"
+
+    def player_no(self, user_id: str) -> Optional[int]:
+        return next((i for i, p in enumerate(self.player_ids) if p == user_id), None)
+
+    def is_autoplay_turn(self) -> bool:
+        return self.state is not None and not self.state.is_finished() and self.autoplay[self.state.current_player_no]
+
+    def play_turn(self, player_no: int, move: Move, cards: int) -> tuple[TurnResult, list[TurnEvent]]:
+        assert self.state is not None
+        turn_number = self.state.turn_no
+        result, events = rules.play_turn(self.state, player_no, move, cards)
+        if TurnEvent.GAME_FINISHED in events:
+            self.status = "finished"
+        if result == TurnResult.SUCCESS:
+            self.new_moves.append(models.GameMove(
+                game_id=self.game_id,
+                turn_number=turn_number,
+                player_index=player_no,
+                move=move.name,
+                cards=cards if move == Move.PLAY else None,
+            ))
+        return result, events
+
+    def serialize(self) -> dict[str, Any]:
+        """
+        Same shape as `models.Game.serialize`.
+        """
+        state = self.state
+        return {
+            "id": self.game_id,
+            "turn_number": state.turn_no if state else 0,
+            "current_player_index": state.current_player_no if state else None,
+            "current_player_id": self.player_ids[state.current_player_no] if state else None,
+            "last_card": Card.serialize(state.top_card) if state and state.top_card is not None else None,
+            "last_card_count": state.top_count if state and state.top_card is not None else None,
+            "player_ids": self.player_ids,
+            "status": self.status,
+        }
+
+class Conflict(Exception):
+    """
+    Another request changed the game after it was opened.
+    """
+
+class GameStorage(ABC):
+    @abstractmethod
+    def open(self, game_id: int) -> ContextManager[Optional[StoredGame]]:
+        """
+        The game with `game_id`, or None if there isn't one. The game may only be
+        changed and saved before the context exits.
+        """
+
+    @abstractmethod
+    def save(self, stored: StoredGame):
+        """
+        Raises `Conflict` if the game can't be saved because of another request.
+        """
+
+def append_new_moves(stored: StoredGame):
+    """
+    Adds the moves played since the game was opened to the session, and a snapshot
+    if one is due.
+    """
+    for move in stored.new_moves:
+        db.session.add(move)
+        move_count = move.turn_number + 1
+        if move_count % SNAPSHOT_INTERVAL == 0 and move is stored.new_moves[-1]:
+            assert stored.state is not None
+            db.session.add(models.GameSnapshot(stored.game_id, move_count, stored.state))
+    stored.new_moves = []
+
+def apply_to_row(game: models.Game, stored: StoredGame):
+    """
+    Copies what may have changed since the game was opened to its row.
+    """
+    if stored.state:
+        game.apply_state(stored.state)
+    game.last_move_key = stored.last_move_key
+    for player, autoplay in zip(game.players, stored.autoplay):
+        if player.autoplay != autoplay:
+            player.autoplay = autoplay
+            game.touch()
+
+def replay(game_id: int) -> Optional[GameState]:
+    """
+    Rebuilds the game's state from its latest snapshot and the moves played since.
+    None if the game has no snapshot, because it started before moves were logged.
+    """
+    snapshot = models.GameSnapshot.query.\
+        filter_by(game_id=game_id).\
+        order_by(models.GameSnapshot.move_count.desc()).\
+        first()
+    if not snapshot:
+        return None
+    state = snapshot.to_state()
+    moves = models.GameMove.query.\
+        filter(models.GameMove.game_id == game_id, models.GameMove.turn_number >= snapshot.move_count).\
+        order_by(models.GameMove.turn_number)
+    for move in moves:
+        result, _ = rules.play_turn(state, move.player_index, Move[move.move], move.played_cards())
+        assert result == TurnResult.SUCCESS
+    return state
+
+def stored_from_row(game: models.Game) -> StoredGame:
+    stored = StoredGame(
+        game_id=game.id,
+        status=game.status,
+        player_ids=list(p.user_id for p in game.players),
+        state=None if game.is_waiting() else game.to_state(),
+        last_move_key=game.last_move_key,
+        autoplay=list(p.autoplay for p in game.players),
+    )
+    stored.row = game
+    return stored
+
+class SQLAlchemyStorage(GameStorage):
+    """
+    Reads and writes the `game` and `player` tables on every request. The game
+    isn't locked: a concurrent change is caught by the row version when saving.
+
+    A turn updates the game and the players whose hand or status changed, and
+    inserts the move, all in one transaction. That is one write more than before
+    moves were logged, and the rows aren't left to be rebuilt from the log,
+    because every other route, the lobby and the turn timer read the rows. With
+    `CachedStorage`, the move is the only write a turn waits for.
+    """
+    def __init__(self, on_saved: Callable[[int], None]):
+        self.on_saved = on_saved
+
+    @contextmanager
+    def open(self, game_id: int) -> Iterator[Optional[StoredGame]]:
+        with span("db"):
+            game = models.Game.load_with_players(game_id)
+        yield stored_from_row(game) if game else None
+
+    def save(self, stored: StoredGame):
+        game = stored.row
+        with span("db"):
+            apply_to_row(game, stored)
+            append_new_moves(stored)
+            try:
+                db.session.commit()
+            except (StaleDataError, IntegrityError):
+                db.session.rollback()
+                raise Conflict()
+        self.on_saved(stored.game_id)
+
+class MemoryStorage(GameStorage):
+    """
+    Keeps games in a dict, and never persists them. Used by the CLI and the tests.
+    """
+    def __init__(self):
+        self.games: dict[int, StoredGame] = {}
+        self.lock = threading.RLock()
+
+    def create(self, player_ids: list[str], state: GameState) -> StoredGame:
+        with self.lock:
+            stored = StoredGame(len(self.games) + 1, "playing", player_ids, state, None)
+            self.games[stored.game_id] = stored
+            return stored
+
+    @contextmanager
+    def open(self, game_id: int) -> Iterator[Optional[StoredGame]]:
+        with self.lock:
+            yield self.games.get(game_id)
+
+    def save(self, stored: StoredGame):
+        # Games are changed in place, and moves aren't logged
+        stored.new_moves = []
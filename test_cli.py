@@ -1,22 +1,29 @@
-from pprint import pprint
 import os
 
-from game import Game, Move, Card, TurnResult, TurnEvent
+from game.rules import Move, TurnEvent
+from game import rules
+from storage import MemoryStorage
+import card as Card
+import hand as Hand
 
-def get_choice(num_options) -> int:
-    choice = None
-    while choice is None:
-        cand = input("Pick an index to play: ")
+def get_choices(num_options) -> list[int]:
+    """
+    One index, or several separated by commas to play cards of the same rank together.
+    """
+    choices = None
+    while choices is None:
+        cand = input("Pick the indexes to play: ")
         try:
-            value = int(cand)
-            if not 0 <= value < num_options:
-                print(f"Invalid index: {value}. Try again.")
+            values = [int(v) for v in cand.split(",")]
+            invalid = [v for v in values if not 0 <= v < num_options]
+            if invalid:
+                print(f"Invalid index: {invalid[0]}. Try again.")
                 continue
-            choice = value
+            choices = values
         except ValueError:
             print(f"Invalid value: {cand}, try again.")
             continue
-    return choice
+    return choices
 
 player_ids = [
     "amey",
@@ -26,47 +33,51 @@ player_ids = [
     "quicksilver",
     "captain marvel",
 ]
-game = Game(player_ids)
+storage = MemoryStorage()
+game_id = storage.create(player_ids, rules.new_game(len(player_ids))).game_id
 game_over = False
 
 os.system("clear")
 print("\n\n\n\n")
 while not game_over:
-    details = game.turn_details()
+    with storage.open(game_id) as stored:
+        state = stored.state
+        player_no = state.current_player_no
 
-    max_length = max(len(s) for s in player_ids)
-    for player in game.players:
-        name = f"{player.id}:".ljust(max_length + 1)
-        arrow = "   <-- to play" if details["player_id"] == player.id else ""
-        status = str(player.status).split(".")[1]
-        print(f"{name} {status}{arrow}")
+        max_length = max(len(s) for s in player_ids)
+        for i, player_id in enumerate(player_ids):
+            name = f"{player_id}:".ljust(max_length + 1)
+            arrow = "   <-- to play" if i == player_no else ""
+            print(f"{name} {state.statuses[i].name}{arrow}")
 
-    print()
-    current_player_id = details['player_id']
+        print()
+        current_player_id = player_ids[player_no]
+        top_card = Card.description(state.top_card) if state.top_card is not None else None
 
-    print(f"It is {current_player_id}'s turn.")
-    print(f"Last card played: {details['top_card']}\n")
-    print("These are the cards you have:")
-    
-    print(f"\t0: PASS")
-    cards = details["hand"]
-    for i, card in enumerate(cards, start=1):
-        playable = "   <-- playable" if card in details["playable_cards"] else ""
-        print(f"\t{i}: {str(card).ljust(15)}{playable}")
+        print(f"It is {current_player_id}'s turn.")
+        print(f"Last card played: {top_card} (x{state.top_count})\n")
+        print("These are the cards you have:")
 
-    print()
-    choice = get_choice(num_options=len(cards)+1)
+        print(f"\t0: PASS")
+        cards = list(Hand.cards(state.hands[player_no]))
+        playable = state.playable(player_no)
+        for i, card in enumerate(cards, start=1):
+            arrow = "   <-- playable" if Hand.contains(playable, card) else ""
+            print(f"\t{i}: {Card.description(card).ljust(15)}{arrow}")
+
+        print()
+        choices = get_choices(num_options=len(cards)+1)
 
-    os.system("clear")
+        os.system("clear")
 
-    if choice == 0:
-        # Doesn't matter what card we pass
-        result, events = game.play_turn(details["player_no"], Move.PASS, Card(0))
-        print(f"{current_player_id} passed.\n")
-    else:
-        card = cards[choice - 1]
-        result, events = game.play_turn(details["player_no"], Move.PLAY, Card(card["value"]))
-        print(f"{current_player_id} played {card}.\n")
+        if 0 in choices:
+            result, events = stored.play_turn(player_no, Move.PASS, Hand.EMPTY)
+            print(f"{current_player_id} passed.\n")
+        else:
+            chosen = [cards[choice - 1] for choice in choices]
+            result, events = stored.play_turn(player_no, Move.PLAY, Hand.from_cards(chosen))
+            print(f"{current_player_id} played {[Card.description(c) for c in chosen]}.\n")
+        storage.save(stored)
 
     print(f"{result =}")
     print(f"{events =}")
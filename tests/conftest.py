@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from sqlalchemy import event, text # type: ignore
+
+# A scratch Postgres database, e.g. postgresql://president@localhost/president_test.
+# Tests that need it are skipped without it.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Read by `app` when it is imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+@pytest.fixture(scope="session")
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL isn't set")
+    from app import app
+    from models import db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+def empty_database(app):
+    from models import db
+    with app.app_context():
+        tables = ", ".join(table.name for table in db.metadata.sorted_tables)
+        db.session.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+        db.session.commit()
+        db.session.remove()
+    return db
+
+@pytest.fixture
+def db(app):
+    """
+    The database, emptied before each test.
+    """
+    return empty_database(app)
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+@pytest.fixture
+def statements(app, db):
+    """
+    Every SQL statement run while the test runs, in order.
+    """
+    recorded: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+from flask import Flask
+
+SLEEP_SECONDS = 0.3
+
+async def get(application, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 1234),
+    }
+    sent: list[dict] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+    await application(scope, receive, send)
+    return sent[0]["status"]
+
+def test_flask_requests_run_at_once(app):
+    from asgi import Application
+    slow = Flask(__name__)
+    threads = set()
+
+    @slow.route("/slow")
+    def slow_route():
+        threads.add(threading.get_ident())
+        time.sleep(SLEEP_SECONDS)
+        return "ok"
+
+    application = Application(slow, threads=4)
+
+    async def four_requests():
+        return await asyncio.gather(*(get(application, "/slow") for _ in range(4)))
+
+    started = time.monotonic()
+    assert asyncio.run(four_requests()) == [200] * 4
+    # One after another, they would take four times as long
+    assert time.monotonic() - started < 2 * SLEEP_SECONDS
+    assert len(threads) == 4
@@ -0,0 +1,24 @@
+from sqlalchemy import update # type: ignore
+
+from autoplay import Autoplayer
+from storage import SQLAlchemyStorage
+from tests.test_statement_counts import create_game
+import models
+
+def test_recover_plays_waiting_games(app, db, client):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    game = client.get(f"/api/games/{game_id}").json
+    # Turned on by a process that stopped before playing the turn
+    with app.app_context():
+        db.session.execute(
+            update(models.Player).
+            where(models.Player.game_id == game_id, models.Player.game_player_index == game["current_player_index"]).
+            values(autoplay=True)
+        )
+        db.session.commit()
+
+    autoplayer = Autoplayer(app, SQLAlchemyStorage(on_saved=lambda game_id: None))
+    # What `recover` runs in the background, which queues the game to be played
+    autoplayer.queue_waiting()
+    autoplayer.executor.shutdown(wait=True)
+    assert client.get(f"/api/games/{game_id}").json["turn_number"] > game["turn_number"]
@@ -0,0 +1,13 @@
+"""
+`BatchGame` only plays single cards, see `pick_moves`.
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from game.batch import compare_with_engine  # noqa: E402
+
+@pytest.mark.parametrize("num_players", [2, 3, 4, 6])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matches_game_engine(num_players: int, seed: int):
+    assert compare_with_engine(num_games=200, num_players=num_players, seed=seed) is None
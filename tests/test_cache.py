@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+from sqlalchemy import update # type: ignore
+from sqlalchemy.exc import OperationalError # type: ignore
+
+from cache import GameCache, CachedStorage
+from storage import Conflict
+from game.rules import Move, TurnResult
+from game.search import quick_move
+from tests.test_statement_counts import create_game
+import hand as Hand
+import models
+
+def test_failed_save_evicts_the_game(app, db, client, monkeypatch):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    storage = CachedStorage(GameCache(app, flush_interval=0.01, on_persisted=lambda game_id: None))
+
+    with app.app_context():
+        with storage.open(game_id) as stored:
+            state = stored.state
+            turn_no = state.turn_no
+            player_no = state.current_player_no
+            card = next(Hand.cards(state.playable(player_no)))
+            result, _ = stored.play_turn(player_no, Move.PLAY, Hand.CARD_BITS[card])
+            assert result == TurnResult.SUCCESS
+
+            def lose_connection():
+                raise OperationalError("COMMIT", {}, Exception("server closed the connection"))
+            monkeypatch.setattr(db.session, "commit", lose_connection)
+            with pytest.raises(OperationalError):
+                storage.save(stored)
+            monkeypatch.undo()
+        assert game_id not in storage.cache.games
+
+        # Read back from the move log, without the move that wasn't saved
+        with storage.open(game_id) as stored:
+            assert stored.state.turn_no == turn_no
+            assert Hand.contains(stored.state.hands[player_no], card)
+
+def test_finished_game_is_kept_until_saved(app, db, client, monkeypatch):
+    game_id = create_game(client, ["a", "b"], start=True)
+    # Flushed by the test instead, at the worst time
+    monkeypatch.setattr(GameCache, "write_behind", lambda cache: None)
+    storage = CachedStorage(GameCache(app, flush_interval=0, on_persisted=lambda game_id: None))
+
+    # The commits of the threads with these names wait until they are let go
+    committing = {"flush": threading.Event(), "play": threading.Event()}
+    resume = {"flush": threading.Event(), "play": threading.Event()}
+    commit = db.session.commit
+
+    def paused_commit():
+        name = threading.current_thread().name
+        if name in committing:
+            committing[name].set()
+            resume[name].wait()
+        commit()
+    monkeypatch.setattr(db.session, "commit", paused_commit)
+
+    errors = []
+    finished = []
+
+    def play_turn():
+        with app.app_context(), storage.open(game_id) as stored:
+            player_no = stored.state.current_player_no
+            result, _ = stored.play_turn(player_no, *quick_move(stored.state, player_no))
+            assert result == TurnResult.SUCCESS
+            try:
+                storage.save(stored)
+            except Exception as e:
+                errors.append(e)
+            finished.append(stored.state.is_finished())
+
+    def start(target, name: str) -> threading.Thread:
+        committing[name].clear()
+        resume[name].clear()
+        thread = threading.Thread(target=target, name=name)
+        thread.start()
+        return thread
+
+    resume["play"].set()
+    with app.app_context():
+        play_turn()
+    while not finished[-1]:
+        # The flush has written the previous moves, and commits them after the
+        # next move is played but before it is saved
+        flush = start(storage.cache.flush, "flush")
+        assert committing["flush"].wait(5)
+        play = start(play_turn, "play")
+        assert committing["play"].wait(5)
+        resume["flush"].set()
+        flush.join(0.05)
+        resume["play"].set()
+        play.join()
+        flush.join()
+        assert not errors
+
+    with app.app_context():
+        storage.cache.flush()
+    assert game_id not in storage.cache.games
+    assert client.get(f"/api/games/{game_id}").json["status"] == "finished"
+
+def test_conflict_on_a_game_that_is_not_cached(app, db, client, monkeypatch):
+    game_id = create_game(client, ["a", "b"])
+    monkeypatch.setattr(GameCache, "write_behind", lambda cache: None)
+    storage = CachedStorage(GameCache(app, flush_interval=0, on_persisted=lambda game_id: None))
+
+    with app.app_context():
+        with storage.open(game_id) as stored:
+            stored.autoplay[1] = True
+            # Another request changes the game in the meantime
+            with db.engine.begin() as connection:
+                connection.execute(
+                    update(models.Game).
+                    where(models.Game.id == game_id).
+                    values(row_version=models.Game.row_version + 1)
+                )
+            with pytest.raises(Conflict):
+                storage.save(stored)
@@ -0,0 +1,70 @@
+import pytest
+
+import hand as Hand
+
+def card(rank: int, suit: int) -> int:
+    return suit * 13 + rank
+
+def play(rank: int, *suits: int) -> int:
+    return Hand.from_cards(card(rank, suit) for suit in suits)
+
+FOURS = play(1, 0, 1, 2)
+SEVEN = play(4, 3)
+ACES = play(11, 1, 2)
+MIXED_HAND = FOURS | SEVEN | ACES
+
+@pytest.mark.parametrize("cards, top_card, top_count, legal", [
+    # Leading a round, any number of cards of one rank
+    (play(2, 0), None, 1, True),
+    (play(2, 0, 1), None, 1, True),
+    (play(2, 0, 1, 3), None, 1, True),
+    (play(2, 0, 1, 2, 3), None, 1, True),
+    (play(2, 0) | play(3, 0), None, 1, False),
+    (Hand.EMPTY, None, 1, False),
+    # As many cards as the last play, of at least its rank
+    (play(5, 0, 1), card(3, 0), 2, True),
+    (play(3, 1, 2), card(3, 0), 2, True),
+    (play(2, 0, 1), card(3, 0), 2, False),
+    (play(9, 0, 1, 2), card(3, 0), 3, True),
+    (play(2, 0, 1, 2), card(3, 0), 3, False),
+    # Count mismatch with the pile
+    (play(5, 0), card(3, 0), 2, False),
+    (play(5, 0, 1, 2), card(3, 0), 2, False),
+    (play(5, 0, 1), card(3, 0), 1, False),
+    (play(5, 0, 1), card(3, 0), 3, False),
+    # Pairs of two ranks
+    (play(5, 0) | play(6, 0), card(3, 0), 2, False),
+])
+def test_is_legal_play(cards, top_card, top_count, legal):
+    assert Hand.is_legal_play(cards, top_card, top_count) == legal
+
+def test_play_rank():
+    assert Hand.play_rank(FOURS) == 1
+    assert Hand.play_rank(FOURS | SEVEN) is None
+    assert Hand.play_rank(Hand.EMPTY) is None
+
+def test_playable():
+    assert Hand.playable(MIXED_HAND, None) == MIXED_HAND
+    assert Hand.playable(MIXED_HAND, card(2, 0), 1) == SEVEN | ACES
+    # Only ranks the hand has enough cards of
+    assert Hand.playable(MIXED_HAND, card(0, 0), 2) == FOURS | ACES
+    assert Hand.playable(MIXED_HAND, card(2, 0), 2) == ACES
+    assert Hand.playable(MIXED_HAND, card(0, 0), 3) == FOURS
+    assert Hand.playable(MIXED_HAND, card(0, 0), 4) == Hand.EMPTY
+
+def test_plays():
+    assert list(Hand.plays(MIXED_HAND, None)) == [
+        play(1, 0),
+        play(1, 0, 1),
+        FOURS,
+        SEVEN,
+        play(11, 1),
+        ACES,
+    ]
+    assert list(Hand.plays(MIXED_HAND, card(0, 0), 1)) == [play(1, 0), SEVEN, play(11, 1)]
+    assert list(Hand.plays(MIXED_HAND, card(0, 0), 2)) == [play(1, 0, 1), ACES]
+    assert list(Hand.plays(MIXED_HAND, card(1, 3), 3)) == [FOURS]
+    assert list(Hand.plays(MIXED_HAND, card(12, 0), 1)) == []
+    # Every play generated is legal
+    for top_card, top_count in ((None, 1), (card(0, 0), 1), (card(0, 0), 2), (card(1, 0), 3)):
+        assert all(Hand.is_legal_play(p, top_card, top_count) for p in Hand.plays(MIXED_HAND, top_card, top_count))
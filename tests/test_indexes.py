@@ -0,0 +1,74 @@
+"""
+The hot queries must use an index once there are many historical games.
+"""
+import pytest
+from sqlalchemy import insert, select, text # type: ignore
+
+from autoplay import waiting_on_autoplay
+from models import db, Game, Player, utcnow
+from tests.conftest import empty_database
+import lobby
+
+NUM_GAMES = 10000
+PLAYERS_PER_GAME = 4
+
+@pytest.fixture(scope="module")
+def many_games(app):
+    """
+    The id of the last of `NUM_GAMES` games, created once for the module.
+    """
+    empty_database(app)
+    with app.app_context():
+        now = utcnow()
+        db.session.execute(insert(Game), [
+            {
+                # Mostly finished, as in a database that has been played on
+                "status": "waiting" if game_no % 20 == 0 else "finished",
+                "turn_number": 0,
+                "last_card_count": 1,
+                "num_players": PLAYERS_PER_GAME,
+                "row_version": 1,
+                "updated_at": now,
+            }
+            for game_no in range(NUM_GAMES)
+        ])
+        db.session.execute(insert(Player), [
+            {
+                "user_id": f"user-{seat}",
+                "game_id": game_id,
+                "game_player_index": seat,
+                "status": "ACTIVE",
+                "autoplay": seat == 1 and game_id % 50 == 0,
+            }
+            for game_id in range(1, NUM_GAMES + 1)
+            for seat in range(PLAYERS_PER_GAME)
+        ])
+        db.session.commit()
+        db.session.execute(text("ANALYZE game"))
+        db.session.execute(text("ANALYZE player"))
+        db.session.commit()
+    return NUM_GAMES
+
+def hot_queries(game_id: int) -> dict[str, object]:
+    return {
+        "load_with_players": select(Game).outerjoin(Player, Player.game_id == Game.id).where(Game.id == game_id),
+        "player_by_user": select(Player).filter_by(game_id=game_id, user_id="user-1"),
+        "player_by_seat": select(Player).filter_by(game_id=game_id, game_player_index=1),
+        "lobby_page": lobby.page_query("waiting", before=game_id // 2, limit=lobby.DEFAULT_LIMIT),
+        "waiting_on_autoplay": waiting_on_autoplay(),
+    }
+
+def explain(statement) -> list[str]:
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    return list(db.session.execute(text(f"EXPLAIN {compiled}")).scalars())
+
+@pytest.mark.parametrize("query", list(hot_queries(1)))
+def test_uses_an_index(app, many_games, query):
+    with app.app_context():
+        plan = explain(hot_queries(many_games)[query])
+    assert not any("Seq Scan" in line for line in plan), "\n".join(plan)
+
+def test_lobby_uses_status_index(app, many_games):
+    with app.app_context():
+        plan = explain(hot_queries(many_games)["lobby_page"])
+    assert any("game_status_id_idx" in line for line in plan), "\n".join(plan)
@@ -0,0 +1,6 @@
+def test_unmatched_paths_share_a_route(client):
+    for path in ("/wp-login.php", "/.env", "/api/nope"):
+        assert client.get(path).status_code == 404
+    routes = client.get("/metrics").json["routes"]
+    assert routes["<unmatched>"]["requests"] >= 3
+    assert not any(route.startswith("/wp-") or route == "/.env" for route in routes)
@@ -0,0 +1,32 @@
+from sqlalchemy import text # type: ignore
+
+from models.player import Player, migrate_hands
+from tests.test_statement_counts import create_game
+import hand as Hand
+
+LEGACY_HAND = [0, 13, 5]
+
+def make_legacy(db, game_id: int):
+    db.session.execute(
+        text("UPDATE player SET hand_mask = NULL, hand = :hand WHERE game_id = :game_id"),
+        {"hand": LEGACY_HAND, "game_id": game_id},
+    )
+    db.session.commit()
+    db.session.remove()
+
+def stored_hands(db, game_id: int) -> list[tuple]:
+    return db.session.execute(
+        text("SELECT hand_mask, hand FROM player WHERE game_id = :game_id ORDER BY id"),
+        {"game_id": game_id},
+    ).all()
+
+def test_migrate_hands(app, db, client):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    with app.app_context():
+        make_legacy(db, game_id)
+        assert migrate_hands(batch_size=2) == 3
+        assert stored_hands(db, game_id) == [(Hand.from_cards(LEGACY_HAND), None)] * 3
+        assert migrate_hands() == 0
+        players = Player.query.filter_by(game_id=game_id).all()
+        assert all(p.hand_mask == Hand.from_cards(LEGACY_HAND) for p in players)
+
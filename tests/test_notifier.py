@@ -0,0 +1,74 @@
+import time
+
+from sqlalchemy import text # type: ignore
+
+from notifier import LocalNotifier, PostgresNotifier
+import notifier as Notifier
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_versions_are_bounded(monkeypatch):
+    monkeypatch.setattr(Notifier, "MAX_VERSIONS", 10)
+    notifier = LocalNotifier()
+    first = notifier.version(1)
+    notifier.notify(1)
+    since = notifier.version(1)
+    for game_id in range(2, 100):
+        notifier.notify(game_id)
+    assert len(notifier.versions) <= 10
+    # Forgotten, but still seen as notified
+    assert notifier.version(1) not in (first, since)
+    assert notifier.wait(1, since, timeout=0)
+
+def test_listener_failures_are_logged(caplog):
+    notifier = LocalNotifier()
+    notified = []
+
+    def broken(game_id):
+        raise RuntimeError("closed")
+    notifier.add_listener(broken)
+    notifier.add_listener(notified.append)
+    notifier.notify(1)
+    assert notified == [1]
+    assert "Notifying a listener of game 1 failed" in caplog.text
+
+def test_postgres_notifier_reconnects(app, db, monkeypatch):
+    monkeypatch.setattr(Notifier, "MIN_RECONNECT_SECONDS", 0.01)
+    # With the app's SQLAlchemy URL, which may name a driver
+    notifier = PostgresNotifier(app.config["SQLALCHEMY_DATABASE_URI"])
+    notified: list[int] = []
+    notifier.add_listener(notified.append)
+
+    def backends() -> int:
+        count = db.session.execute(text(
+            "SELECT count(*) FROM pg_stat_activity WHERE query LIKE 'LISTEN%' AND pid != pg_backend_pid()"
+        )).scalar()
+        # Activity is read once per transaction
+        db.session.rollback()
+        return count
+    with app.app_context():
+        assert wait_until(lambda: backends() == 1)
+        notifier.notify(1)
+        assert wait_until(lambda: notified == [1])
+
+        # Both connections are lost
+        db.session.execute(text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE pid != pg_backend_pid() AND datname = current_database()"
+        ))
+        db.session.commit()
+        # Only wakes this process's watchers, and doesn't raise
+        notifier.notify(2)
+        assert wait_until(lambda: notified[-1] == 2)
+
+        assert wait_until(lambda: backends() == 1)
+        assert wait_until(lambda: notifier.send_backoff.ready())
+        notifier.notify(3)
+        assert wait_until(lambda: notified[-1] == 3)
+        assert notifier.send_conn is not None and not notifier.send_conn.closed
@@ -0,0 +1,116 @@
+from sqlalchemy import update # type: ignore
+
+from tests.test_statement_counts import create_game
+import models
+
+def current_turn(client, game_id: int) -> tuple[str, list[dict]]:
+    """
+    The current player's id and their playable cards.
+    """
+    player_id = client.get(f"/api/games/{game_id}").json["current_player_id"]
+    snapshot = client.get(f"/api/games/{game_id}/snapshot?player_id={player_id}").json
+    return player_id, [c for c in snapshot["you"]["hand"] if c["playable"]]
+
+def test_float_card_values(client):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    player_id, playable = current_turn(client, game_id)
+    response = client.post(f"/api/games/{game_id}/play", json={
+        "player_id": player_id,
+        "move": "PLAY",
+        "card_values": [float(playable[0]["value"])],
+    })
+    assert response.status_code == 200, response.json
+
+    player_id, playable = current_turn(client, game_id)
+    response = client.post(f"/api/games/{game_id}/play", json={
+        "player_id": player_id,
+        "move": "PLAY" if playable else "PASS",
+        "card_value": float(playable[0]["value"]) if playable else 0.0,
+    })
+    assert response.status_code == 200, response.json
+
+def test_play_without_cards(client):
+    game_id = create_game(client, ["a", "b"], start=True)
+    player_id, _ = current_turn(client, game_id)
+    response = client.post(f"/api/games/{game_id}/play", json={
+        "player_id": player_id,
+        "move": "PLAY",
+        "card_values": [],
+    })
+    assert response.status_code == 400
+    assert response.json["error"] == "card_values_required"
+
+def test_autoplay_changes_the_etag(client):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    player_id, _ = current_turn(client, game_id)
+    # A seat whose turn it isn't, so that nothing is autoplayed
+    other_id = next(p for p in ("a", "b", "c") if p != player_id)
+    game = client.get(f"/api/games/{game_id}")
+    player = client.get(f"/api/games/{game_id}/players/{other_id}")
+    updates = client.get(f"/api/games/{game_id}/updates?version=0")
+    version = updates.json["version"]
+
+    response = client.post(f"/api/games/{game_id}/players/{other_id}/autoplay", json={"enabled": True})
+    assert response.status_code == 200, response.json
+
+    assert client.get(f"/api/games/{game_id}", headers={"If-None-Match": game.headers["ETag"]}).status_code == 200
+    response = client.get(f"/api/games/{game_id}/players/{other_id}", headers={"If-None-Match": player.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json["autoplay"] is True
+    assert client.get(f"/api/games/{game_id}/updates?version={version}").json["version"] != version
+
+def play_lowest(client, game_id: int, headers=None, **body):
+    player_id, playable = current_turn(client, game_id)
+    return client.post(f"/api/games/{game_id}/play", headers=headers, json={
+        "player_id": player_id,
+        "move": "PLAY",
+        "card_values": [playable[0]["value"]],
+        **body,
+    })
+
+def test_stale_turn_number(client):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    assert play_lowest(client, game_id, turn_number=1).status_code == 409
+    assert play_lowest(client, game_id, turn_number=0).status_code == 200
+    response = play_lowest(client, game_id, turn_number=0)
+    assert response.status_code == 409
+    assert response.json["error"] == "turn_conflict"
+
+def test_concurrent_change(client, db, monkeypatch):
+    import app as app_module
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    save = app_module.game_storage.save
+
+    def save_after_another_request(stored):
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(models.Game).
+                where(models.Game.id == game_id).
+                values(row_version=models.Game.row_version + 1)
+            )
+        save(stored)
+    monkeypatch.setattr(app_module.game_storage, "save", save_after_another_request)
+    response = play_lowest(client, game_id)
+    assert response.status_code == 409
+    assert response.json["error"] == "turn_conflict"
+    monkeypatch.undo()
+    assert client.get(f"/api/games/{game_id}").json["turn_number"] == 0
+
+def test_idempotent_replay(client):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    player_id, _ = current_turn(client, game_id)
+    headers = {"Idempotency-Key": "move-1"}
+    first = play_lowest(client, game_id, headers=headers, turn_number=0)
+    assert first.status_code == 200
+    assert "replayed" not in first.json
+
+    # The same request again, after the turn has moved on
+    body = {"player_id": player_id, "move": "PASS", "turn_number": 0}
+    retry = client.post(f"/api/games/{game_id}/play", headers=headers, json=body)
+    assert retry.status_code == 200
+    assert retry.json["replayed"] is True
+    assert retry.json["game"] == first.json["game"]
+
+    # Only for the game's players
+    body["player_id"] = "stranger"
+    assert client.post(f"/api/games/{game_id}/play", headers=headers, json=body).status_code == 404
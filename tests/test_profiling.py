@@ -0,0 +1,27 @@
+import pytest
+from flask import request
+
+from tests.test_statement_counts import create_game
+import profiling
+
+# Each read route, its view's arguments, and its query string
+READS = [
+    ("get_game", {"game_id": "{id}"}, {}),
+    ("get_game_snapshot", {"game_id": "{id}"}, {"player_id": "a"}),
+    ("watch_game", {"game_id": "{id}"}, {}),
+    ("get_player", {"game_id": "{id}", "player_id": "a"}, {}),
+    # After the first page, which is cached
+    ("list_games", {}, {"before": "1000000"}),
+]
+
+@pytest.mark.parametrize("endpoint, view_args, query_string", READS)
+def test_reads_are_timed(app, client, monkeypatch, endpoint, view_args, query_string):
+    game_id = create_game(client, ["a", "b"], start=True)
+    view_args = {name: int(value.format(id=game_id)) if name == "game_id" else value for name, value in view_args.items()}
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    with app.test_request_context(query_string=query_string):
+        totals: dict[str, float] = {}
+        request.environ[profiling.REQUEST_SPANS] = totals
+        response = app.make_response(app.view_functions[endpoint](**view_args))
+        assert response.status_code == 200
+        assert totals["db"] > 0
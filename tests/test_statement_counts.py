@@ -0,0 +1,49 @@
+"""
+How many SQL statements each turn path endpoint runs.
+"""
+
+def create_game(client, player_ids: list[str], start: bool = False) -> int:
+    response = client.post("/api/games", json={"player_id": player_ids[0]})
+    game_id = response.json["id"]
+    for player_id in player_ids[1:]:
+        client.post(f"/api/games/{game_id}/join", json={"player_id": player_id})
+    if start:
+        client.post(f"/api/games/{game_id}/start")
+    return game_id
+
+def count(statements: list[str], send, *args, **kwargs) -> int:
+    """
+    The statements run by the request `send(*args, **kwargs)`.
+    """
+    statements.clear()
+    response = send(*args, **kwargs)
+    assert response.status_code < 300, response.json
+    return len(statements)
+
+def test_join(client, statements):
+    game_id = create_game(client, ["a", "b"])
+    # SELECT ... FOR UPDATE, INSERT player, UPDATE game
+    assert count(statements, client.post, f"/api/games/{game_id}/join", json={"player_id": "c"}) == 3, statements
+
+def test_start(client, statements):
+    game_id = create_game(client, ["a", "b", "c"])
+    # SELECT ... FOR UPDATE, UPDATE game, UPDATE players, INSERT snapshot
+    assert count(statements, client.post, f"/api/games/{game_id}/start") == 4, statements
+
+def test_play(client, statements):
+    game_id = create_game(client, ["a", "b", "c"], start=True)
+    player_id = client.get(f"/api/games/{game_id}").json["current_player_id"]
+    snapshot = client.get(f"/api/games/{game_id}/snapshot?player_id={player_id}").json
+    card = next(c for c in snapshot["you"]["hand"] if c["playable"])
+    play = {"player_id": player_id, "move": "PLAY", "card_values": [card["value"]]}
+    # SELECT game and players, UPDATE game, UPDATE the player's hand, INSERT move
+    assert count(statements, client.post, f"/api/games/{game_id}/play", json=play) == 4, statements
+
+    player_id = client.get(f"/api/games/{game_id}").json["current_player_id"]
+    pass_turn = {"player_id": player_id, "move": "PASS"}
+    # SELECT game and players, UPDATE game, UPDATE the player's status, INSERT move
+    assert count(statements, client.post, f"/api/games/{game_id}/play", json=pass_turn) == 4, statements
+
+def test_read_snapshot(client, statements):
+    game_id = create_game(client, ["a", "b"], start=True)
+    assert count(statements, client.get, f"/api/games/{game_id}/snapshot?player_id=a") == 1, statements
@@ -0,0 +1,54 @@
+from game.rules import Move, TurnResult
+from game.search import quick_move
+from game import rules
+from notifier import LocalNotifier
+from storage import MemoryStorage
+from timeouts import TurnTimer
+import hand as Hand
+
+def new_game(storage: MemoryStorage, num_players: int) -> int:
+    player_ids = [str(p) for p in range(num_players)]
+    return storage.create(player_ids, rules.new_game(num_players)).game_id
+
+def test_play_a_game():
+    storage = MemoryStorage()
+    game_id = new_game(storage, 4)
+    for _ in range(1000):
+        with storage.open(game_id) as stored:
+            if stored.state.is_finished():
+                break
+            player_no = stored.state.current_player_no
+            result, _ = stored.play_turn(player_no, *quick_move(stored.state, player_no))
+            assert result == TurnResult.SUCCESS
+            storage.save(stored)
+            assert stored.new_moves == []
+    assert stored.status == "finished"
+    assert all(hand == Hand.EMPTY for hand in stored.state.hands)
+
+def test_wrong_player():
+    storage = MemoryStorage()
+    game_id = new_game(storage, 3)
+    with storage.open(game_id) as stored:
+        player_no = (stored.state.current_player_no + 1) % 3
+        assert stored.play_turn(player_no, Move.PASS, Hand.EMPTY)[0] == TurnResult.WRONG_PLAYER
+        assert stored.state.turn_no == 0
+
+def test_turn_timeout():
+    storage = MemoryStorage()
+    game_id = new_game(storage, 3)
+    played = []
+    timer = TurnTimer(None, storage, LocalNotifier(), on_played=played.append)
+
+    # Leads the round, so plays rather than passing
+    timer.expire(game_id, 0)
+    with storage.open(game_id) as stored:
+        assert stored.state.turn_no == 1
+        assert stored.state.top_card is not None
+    assert played == [stored]
+
+    # A turn that has already been played
+    timer.expire(game_id, 0)
+    timer.expire(game_id, 1)
+    with storage.open(game_id) as stored:
+        assert stored.state.turn_no == 2
+        assert stored.state.statuses[(stored.state.current_player_no - 1) % 3] == rules.PlayerStatus.PASSED
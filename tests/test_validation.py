@@ -0,0 +1,50 @@
+import itertools
+
+from jsonschema.validators import validator_for # type: ignore
+
+from game.rules import MAX_PLAYERS
+from tests.test_statement_counts import create_game
+from validation import (
+    compile_schema, validate_create_games, validate_play_turn, PLAY_TURN_SCHEMA, CREATE_GAMES_SCHEMA,
+    SET_AUTOPLAY_SCHEMA,
+)
+import validation
+
+def test_pass_as_sent_by_the_web_ui():
+    # As `playTurn("PASS", [])` in frontend/src/Game.js builds it
+    body = {"move": "PASS", "card_values": [], "player_id": "a", "turn_number": 3}
+    assert validate_play_turn(body) == []
+    assert validate_play_turn({"move": "PASS", "player_id": "a"}) == []
+
+def test_play():
+    assert validate_play_turn({"move": "PLAY", "card_values": [4, 5], "player_id": "a"}) == []
+    assert validate_play_turn({"move": "PLAY", "card_value": 4, "player_id": "a"}) == []
+    assert validate_play_turn({"move": "PLAY", "card_values": [4, 4], "player_id": "a"}) != []
+    assert validate_play_turn({"move": "PLAY", "card_values": [1, 2, 3, 4, 5], "player_id": "a"}) != []
+    assert validate_play_turn({"move": "PLAY", "card_values": [52], "player_id": "a"}) != []
+
+def test_compiled_checks_agree_with_jsonschema():
+    values = [None, True, 0, 3, -1, 5.0, 5.5, 52, "", "a", "PLAY", [], [1], [1, 1], [1, 2, 3, 4, 5], ["a"], {}]
+    for schema in (PLAY_TURN_SCHEMA, CREATE_GAMES_SCHEMA, SET_AUTOPLAY_SCHEMA):
+        validate = compile_schema(schema)
+        validator = validator_for(schema)(schema)
+        names = list(schema["properties"])
+        for combination in itertools.product(values, repeat=2):
+            body = dict(zip(names, combination))
+            assert (validate(body) == []) == validator.is_valid(body), body
+
+def test_refused_by_compiled_checks_only(monkeypatch):
+    monkeypatch.setattr(validation, "compile_check", lambda schema: lambda body: False)
+    validate = compile_schema(SET_AUTOPLAY_SCHEMA)
+    assert validate({"enabled": True}) == [validation.INVALID_BODY]
+
+def test_bulk_games_have_at_most_max_players():
+    seats = [str(p) for p in range(MAX_PLAYERS + 1)]
+    assert validate_create_games({"games": [seats[:MAX_PLAYERS]]}) == []
+    assert validate_create_games({"games": [seats]}) != []
+
+def test_join_a_full_game(client):
+    game_id = create_game(client, [str(p) for p in range(MAX_PLAYERS)])
+    response = client.post(f"/api/games/{game_id}/join", json={"player_id": "late"})
+    assert response.status_code == 400
+    assert response.json["error"] == "game_full"
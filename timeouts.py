@@ -0,0 +1,155 @@
+"""
+Passes for players whose turn runs past `Game.turn_deadline`.
+"""
+from typing import Callable, Optional
+from datetime import datetime
+import heapq
+import logging
+import threading
+import time
+
+from sqlalchemy import select # type: ignore
+
+from game.rules import GameState, Move, TurnResult
+from game.search import quick_move
+from models import db
+from notifier import LocalNotifier
+from storage import GameStorage, StoredGame, Conflict
+import models
+import hand as Hand
+
+logger = logging.getLogger(__name__)
+
+# Longest sleep between checks, in case a notification is missed
+MAX_SLEEP_SECONDS = 1.0
+
+def timeout_move(state: GameState, player_no: int) -> tuple[Move, int]:
+    """
+    A pass, or the lowest cards when the player leads the round.
+    """
+    if state.top_card is not None:
+        return Move.PASS, Hand.EMPTY
+    return quick_move(state, player_no)
+
+class TurnTimer:
+    def __init__(self, app, storage: GameStorage, notifier: LocalNotifier, on_played: Callable[[StoredGame], None]):
+        self.app = app
+        self.storage = storage
+        self.notifier = notifier
+        self.on_played = on_played
+        # (deadline, game id, turn number), with entries for turns that have since
+        # been played left in until they come up
+        self.heap: list[tuple[float, int, int]] = []
+        # The turn each game's latest deadline is for
+        self.turns: dict[int, int] = {}
+        # Games changed since they were last read
+        self.changed: set[int] = set()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    def start(self):
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+
+    def notified(self, game_id: int):
+        with self.lock:
+            self.changed.add(game_id)
+        self.wakeup.set()
+
+    def run(self):
+        self.notifier.add_listener(self.notified)
+        with self.app.app_context():
+            self.recover()
+        while True:
+            self.wakeup.wait(self.seconds_until_next())
+            self.wakeup.clear()
+            with self.app.app_context():
+                try:
+                    self.read_changed()
+                    self.expire_due()
+                except Exception:
+                    logger.exception("Failed to time out turns")
+                    db.session.rollback()
+                finally:
+                    db.session.close()
+
+    def seconds_until_next(self) -> float:
+        if not self.heap:
+            return MAX_SLEEP_SECONDS
+        return min(max(self.heap[0][0] - time.time(), 0), MAX_SLEEP_SECONDS)
+
+    def recover(self):
+        rows = db.session.execute(
+            select(models.Game.id, models.Game.turn_number, models.Game.turn_deadline).
+            where(models.Game.turn_deadline.isnot(None))
+        )
+        for game_id, turn_number, deadline in rows:
+            self.schedule(game_id, turn_number, deadline)
+        logger.info("Recovered %d turn deadlines", len(self.turns))
+        db.session.close()
+
+    def schedule(self, game_id: int, turn_number: int, deadline: Optional[datetime]):
+        if deadline is None:
+            self.turns.pop(game_id, None)
+            return
+        if self.turns.get(game_id) == turn_number:
+            return
+        self.turns[game_id] = turn_number
+        heapq.heappush(self.heap, (deadline.timestamp(), game_id, turn_number))
+
+    def read_changed(self):
+        with self.lock:
+            changed, self.changed = self.changed, set()
+        if not changed:
+            return
+        rows = db.session.execute(
+            select(models.Game.id, models.Game.turn_number, models.Game.turn_deadline).
+            where(models.Game.id.in_(changed))
+        )
+        found = set()
+        for game_id, turn_number, deadline in rows:
+            found.add(game_id)
+            self.schedule(game_id, turn_number, deadline)
+        for game_id in changed - found:
+            # Archived
+            self.turns.pop(game_id, None)
+
+    def expire_due(self):
+        now = time.time()
+        while self.heap and self.heap[0][0] <= now:
+            _, game_id, turn_number = heapq.heappop(self.heap)
+            if self.turns.get(game_id) != turn_number:
+                continue
+            del self.turns[game_id]
+            self.expire(game_id, turn_number)
+
+    def expire(self, game_id: int, turn_number: int):
+        with self.storage.open(game_id) as stored:
+            state = stored.state if stored else None
+            if not stored or not state or state.is_finished() or state.turn_no != turn_number:
+                return
+            player_no = state.current_player_no
+            result, _ = stored.play_turn(player_no, *timeout_move(state, player_no))
+            if result != TurnResult.SUCCESS:
+                logger.error("Timing out game %d failed: %s", game_id, result.name)
+                return
+            stored.last_move_key = None
+            try:
+                self.storage.save(stored)
+            except Conflict:
+                # The player played just in time
+                return
+            logger.info("Player %d timed out in game %d", player_no, game_id)
+        self.on_played(stored)
+
+def main():
+    from app import turn_timer, notifier, autoplayer
+    if type(notifier) is LocalNotifier:
+        logger.warning("GAME_NOTIFIER isn't postgres, so only deadlines from before starting will be kept")
+    # Autoplay turns are queued in the process that saved the turn before, so
+    # the ones queued by a process that has since stopped are picked up here
+    autoplayer.recover()
+    turn_timer.run()
+
+if __name__ == "__main__":
+    main()
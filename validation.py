@@ -0,0 +1,252 @@
+"""
+Request body schemas, compiled into plain Python checks at import.
+"""
+from typing import Any, Callable, Optional
+
+from jsonschema.exceptions import best_match # type: ignore
+from jsonschema.validators import validator_for # type: ignore
+
+from game.rules import Move, MAX_PLAYERS
+
+CARD_VALUE_SCHEMA = {
+    "type": "integer",
+    "minimum": 0,
+    "exclusiveMaximum": 52,
+}
+
+PLAY_TURN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "player_id": {
+            "type": "string",
+        },
+        "move": {
+            "type": "string",
+            "enum": list(m.name for m in Move),
+        },
+        # Cards of one rank to play together. Empty or left out to pass, and a
+        # play without cards is refused by the route.
+        "card_values": {
+            "type": "array",
+            "items": CARD_VALUE_SCHEMA,
+            "maxItems": 4,
+            "uniqueItems": True,
+        },
+        # A single card to play, as sent before plays could have several cards
+        "card_value": CARD_VALUE_SCHEMA,
+        "turn_number": {
+            "type": "integer",
+            "minimum": 0,
+        },
+    },
+    "required": ["player_id", "move"]
+}
+
+CREATE_GAME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "player_id": {
+            "type": "string",
+            "minLength": 1,
+        },
+    },
+    "required": ["player_id"]
+}
+
+JOIN_GAME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "player_id": {
+            "type": "string",
+            "minLength": 1,
+        },
+    },
+    "required": ["player_id"]
+}
+
+Check = Callable[[Any], bool]
+
+# When the compiled checks refuse a body that jsonschema accepts, which would be
+# a bug in the compiled checks
+INVALID_BODY = "Request body is invalid"
+
+def is_integer(value: Any) -> bool:
+    # As in jsonschema, where bools aren't integers but 1.0 is
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def is_unique(value: Any) -> bool:
+    try:
+        return len(set(value)) == len(value)
+    except TypeError:
+        # Unhashable items are left to jsonschema
+        return False
+
+TYPE_CHECKS: dict[str, Check] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": is_integer,
+    "number": is_number,
+    "boolean": lambda value: isinstance(value, bool),
+}
+
+def compile_type(name: str) -> Check:
+    return TYPE_CHECKS[name]
+
+def compile_enum(values: list[Any]) -> Check:
+    if not all(isinstance(v, str) for v in values):
+        raise ValueError("Can only compile enums of strings")
+    allowed = frozenset(values)
+    return lambda value: isinstance(value, str) and value in allowed
+
+def compile_minimum(minimum: float) -> Check:
+    return lambda value: not is_number(value) or value >= minimum
+
+def compile_maximum(maximum: float) -> Check:
+    return lambda value: not is_number(value) or value <= maximum
+
+def compile_exclusive_maximum(maximum: float) -> Check:
+    return lambda value: not is_number(value) or value < maximum
+
+def compile_min_length(min_length: int) -> Check:
+    return lambda value: not isinstance(value, str) or len(value) >= min_length
+
+def compile_min_items(min_items: int) -> Check:
+    return lambda value: not isinstance(value, list) or len(value) >= min_items
+
+def compile_max_items(max_items: int) -> Check:
+    return lambda value: not isinstance(value, list) or len(value) <= max_items
+
+def compile_unique_items(unique: bool) -> Optional[Check]:
+    if not unique:
+        return None
+    return lambda value: not isinstance(value, list) or is_unique(value)
+
+def compile_items(schema: dict[str, Any]) -> Check:
+    check_item = compile_check(schema)
+    return lambda value: not isinstance(value, list) or all(check_item(item) for item in value)
+
+def compile_required(names: list[str]) -> Check:
+    required = tuple(names)
+    return lambda value: not isinstance(value, dict) or all(name in value for name in required)
+
+def compile_properties(schemas: dict[str, dict[str, Any]]) -> Check:
+    properties = tuple((name, compile_check(schema)) for name, schema in schemas.items())
+
+    def check_properties(value: Any) -> bool:
+        if not isinstance(value, dict):
+            return True
+        for name, check in properties:
+            if name in value and not check(value[name]):
+                return False
+        return True
+    return check_properties
+
+# In the order the checks run, with the type first
+KEYWORD_COMPILERS: dict[str, Callable[[Any], Optional[Check]]] = {
+    "type": compile_type,
+    "enum": compile_enum,
+    "minimum": compile_minimum,
+    "maximum": compile_maximum,
+    "exclusiveMaximum": compile_exclusive_maximum,
+    "minLength": compile_min_length,
+    "minItems": compile_min_items,
+    "maxItems": compile_max_items,
+    "uniqueItems": compile_unique_items,
+    "items": compile_items,
+    "required": compile_required,
+    "properties": compile_properties,
+}
+
+def compile_check(schema: dict[str, Any]) -> Check:
+    """
+    Like jsonschema, each keyword only checks values of its own type.
+    """
+    unknown = schema.keys() - KEYWORD_COMPILERS.keys()
+    if unknown:
+        raise ValueError(f"Can't compile schema keywords: {sorted(unknown)}")
+
+    checks: list[Check] = []
+    for keyword, compile_keyword in KEYWORD_COMPILERS.items():
+        check = compile_keyword(schema[keyword]) if keyword in schema else None
+        if check is not None:
+            checks.append(check)
+
+    if len(checks) == 1:
+        return checks[0]
+    checks_tuple = tuple(checks)
+    return lambda value: all(check(value) for check in checks_tuple)
+
+def compile_schema(schema: dict[str, Any]) -> Callable[[Any], list[str]]:
+    """
+    Returns jsonschema's best error message for an invalid body.
+    """
+    check = compile_check(schema)
+    validator = validator_for(schema)(schema)
+
+    def validate(body: Any) -> list[str]:
+        if check(body):
+            return []
+        error = best_match(validator.iter_errors(body))
+        # Refused either way, rather than let through a body the checks refused
+        return [error.message] if error else [INVALID_BODY]
+    return validate
+
+PLAYER_IDS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "string",
+        "minLength": 1,
+    },
+    "minItems": 1,
+    "maxItems": MAX_PLAYERS,
+    "uniqueItems": True,
+}
+
+CREATE_GAMES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        # The seats of each game to create
+        "games": {
+            "type": "array",
+            "items": PLAYER_IDS_SCHEMA,
+            "minItems": 1,
+            "maxItems": 100,
+        },
+        "start": {
+            "type": "boolean",
+        },
+    },
+    "required": ["games"]
+}
+
+REMATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "start": {
+            "type": "boolean",
+        },
+    },
+}
+
+SET_AUTOPLAY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "enabled": {
+            "type": "boolean",
+        },
+    },
+    "required": ["enabled"]
+}
+
+validate_play_turn = compile_schema(PLAY_TURN_SCHEMA)
+validate_create_game = compile_schema(CREATE_GAME_SCHEMA)
+validate_join_game = compile_schema(JOIN_GAME_SCHEMA)
+validate_create_games = compile_schema(CREATE_GAMES_SCHEMA)
+validate_rematch = compile_schema(REMATCH_SCHEMA)
+validate_set_autoplay = compile_schema(SET_AUTOPLAY_SCHEMA)